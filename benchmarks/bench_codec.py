@@ -0,0 +1,67 @@
+"""JSON codec micro-benchmarks on synthetic Moonraker traffic
+
+    python benchmarks/bench_codec.py [--rounds 20]
+
+Compares the codec backend (orjson when installed) with stdlib json for
+decoding str and bytes frames, and pre-encoded with per-call requests.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from custom_components.moonraker import codec  # noqa: E402
+
+FIXTURE = os.path.join(
+    os.path.dirname(__file__), "fixtures", "synthetic_traffic.jsonl"
+)
+
+
+def bench(name: str, func, items: list, rounds: int) -> None:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            func(item)
+    elapsed = time.perf_counter() - start
+    count = len(items) * rounds
+    print(
+        f"{name:<26} {count / elapsed:>12,.0f} ops/s"
+        f" {elapsed / count * 1e6:>8.2f}us/op"
+    )
+
+
+def main(args) -> None:
+    with open(args.fixture, encoding="utf-8") as fixture:
+        frames = [line.strip() for line in fixture if line.strip()]
+    raw = [frame.encode() for frame in frames]
+    decoded = [json.loads(frame) for frame in frames]
+    status = next(
+        frame["result"]["status"]
+        for frame in decoded
+        if "status" in frame.get("result", {})
+    )
+    params = {"objects": dict.fromkeys(status)}
+    static = codec.StaticRequest("printer.objects.subscribe", params)
+    ids = list(range(1000))
+
+    print(f"codec backend: {codec.BACKEND}")
+    bench("json.loads(str)", json.loads, frames, args.rounds)
+    bench("codec.loads(str)", codec.loads, frames, args.rounds)
+    bench("codec.loads(bytes)", codec.loads, raw, args.rounds)
+    bench(
+        "codec.encode_request",
+        lambda i: codec.encode_request("printer.objects.subscribe", i, params),
+        ids,
+        args.rounds,
+    )
+    bench("StaticRequest.encode", static.encode, ids, args.rounds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--rounds", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,156 @@
+"""Parser micro-benchmarks replaying synthetic Moonraker traffic
+
+Run from the repository root inside a Home Assistant development
+environment:
+
+    python benchmarks/bench_parser.py [--frames 20000] [--mix status=4,proc=1]
+
+Reports frames per second, per-frame latency percentiles and allocations
+for Printer.wsparse, Printer.parse, Printer.wsupdate and
+PrinterComponent.update.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from custom_components.moonraker.printer import Printer  # noqa: E402
+
+FIXTURE = os.path.join(
+    os.path.dirname(__file__), "fixtures", "synthetic_traffic.jsonl"
+)
+
+
+def load_traffic(path: str = FIXTURE) -> dict:
+    """Fixture frames grouped by kind"""
+    traffic = {"identify": [], "list": [], "subscribe": [], "status": [], "proc": []}
+    with open(path, encoding="utf-8") as fixture:
+        for line in fixture:
+            frame = json.loads(line)
+            method = frame.get("method")
+            result = frame.get("result", {})
+            if method == "notify_status_update":
+                traffic["status"].append(frame)
+            elif method == "notify_proc_stat_update":
+                traffic["proc"].append(frame)
+            elif "connection_id" in result:
+                traffic["identify"].append(frame)
+            elif "objects" in result:
+                traffic["list"].append(frame)
+            elif "status" in result:
+                traffic["subscribe"].append(frame)
+    return traffic
+
+
+def build_stream(traffic: dict, mix: dict, count: int, seed: int = 0) -> list:
+    """count frames drawn from the traffic with the given weights per kind"""
+    rng = random.Random(seed)
+    kinds = [kind for kind in mix if traffic.get(kind)]
+    weights = [mix[kind] for kind in kinds]
+    cursors = dict.fromkeys(kinds, 0)
+    stream = []
+    for kind in rng.choices(kinds, weights, k=count):
+        frames = traffic[kind]
+        stream.append(frames[cursors[kind] % len(frames)])
+        cursors[kind] += 1
+    return stream
+
+
+def new_printer(traffic: dict) -> Printer:
+    printer = Printer("bench")
+    for frame in traffic["list"]:
+        printer.register_objects(frame["result"]["objects"])
+    return printer
+
+
+async def run_case(printer: Printer, func, frames: list) -> list:
+    """Per-frame latencies in nanoseconds"""
+    latencies = []
+    clock = time.perf_counter_ns
+    for frame in frames:
+        start = clock()
+        await func(frame)
+        latencies.append(clock() - start)
+        printer.pop_changes()
+    return latencies
+
+
+async def measure_allocations(printer: Printer, func, frames: list) -> tuple:
+    """(peak transient, retained) bytes per frame, measured in a separate pass"""
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    transient = 0
+    for frame in frames:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        await func(frame)
+        printer.pop_changes()
+        transient += tracemalloc.get_traced_memory()[1] - before
+    retained = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return transient / len(frames), retained / len(frames)
+
+
+def percentile(values: list, pct: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def report(name: str, latencies: list, allocations: tuple) -> None:
+    latencies = sorted(latencies)
+    total = sum(latencies) / 1e9
+    print(
+        f"{name:<26} {len(latencies) / total:>12,.0f} fps"
+        f"  p50 {percentile(latencies, 50) / 1e3:>7.2f}us"
+        f"  p90 {percentile(latencies, 90) / 1e3:>7.2f}us"
+        f"  p99 {percentile(latencies, 99) / 1e3:>7.2f}us"
+        f"  peak {allocations[0]:>6.0f} B/frame"
+        f"  retained {allocations[1]:>5.1f} B/frame"
+    )
+
+
+async def main(args) -> None:
+    traffic = load_traffic(args.fixture)
+    mix = {
+        kind: float(weight)
+        for kind, weight in (item.split("=") for item in args.mix.split(","))
+    }
+    stream = build_stream(traffic, mix, args.frames)
+    status = build_stream(traffic, {"status": 1}, args.frames)
+    snapshots = build_stream(traffic, {"subscribe": 1}, max(1, args.frames // 10))
+    components = [
+        frame["params"][0]["extruder"]
+        for frame in status
+        if "extruder" in frame["params"][0]
+    ]
+
+    printer = new_printer(traffic)
+    cases = (
+        ("Printer.wsparse (mix)", printer.wsparse, stream),
+        ("Printer.parse (snapshot)", printer.parse, snapshots),
+        ("Printer.wsupdate (status)", printer.wsupdate, status),
+        ("PrinterComponent.update", printer.extruder.update, components),
+    )
+    for name, func, frames in cases:
+        await run_case(printer, func, frames[: args.warmup])
+        latencies = await run_case(printer, func, frames)
+        allocations = await measure_allocations(printer, func, frames)
+        report(name, latencies, allocations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=1000)
+    parser.add_argument(
+        "--mix",
+        default="status=4,proc=1",
+        help="comma separated kind=weight, kinds: status, proc, subscribe",
+    )
+    asyncio.run(main(parser.parse_args()))
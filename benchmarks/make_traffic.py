@@ -0,0 +1,221 @@
+"""Generate the synthetic Moonraker traffic fixture used by the benchmarks
+
+    python benchmarks/make_traffic.py [--seconds 100] [--seed 0]
+
+Writes the identify, objects list and subscribe responses, then one
+second after the other: four notify_status_update deltas (a printer
+mid-print reporting every 250 ms) and one notify_proc_stat_update. Values
+follow seeded random walks, so the file is reproducible. It is not a
+capture of a real printer, the frame shapes and rates are what Moonraker
+sends but the numbers are made up.
+"""
+import argparse
+import json
+import os
+import random
+
+FIXTURE = os.path.join(
+    os.path.dirname(__file__), "fixtures", "synthetic_traffic.jsonl"
+)
+
+START = 3312.5
+TIME_BASE = 1670000000.0
+OBJECTS = [
+    "webhooks",
+    "configfile",
+    "mcu",
+    "gcode_move",
+    "print_stats",
+    "virtual_sdcard",
+    "pause_resume",
+    "display_status",
+    "gcode_macro PRINT_START",
+    "heater_bed",
+    "heaters",
+    "fan",
+    "heater_fan hotend_fan",
+    "controller_fan board_fan",
+    "temperature_sensor mcu",
+    "temperature_sensor raspberry_pi",
+    "filament_switch_sensor runout",
+    "probe",
+    "bed_mesh",
+    "extruder",
+    "extruder1",
+    "toolhead",
+    "motion_report",
+    "system_stats",
+    "idle_timeout",
+    "query_endstops",
+]
+
+
+def snapshot() -> dict:
+    """Subscribe response status of a printer mid-print"""
+    return {
+        "webhooks": {"state": "ready", "state_message": "Printer is ready"},
+        "print_stats": {
+            "filename": "benchy.gcode",
+            "total_duration": 812.4,
+            "print_duration": 790.1,
+            "filament_used": 1532.6,
+            "state": "printing",
+            "message": "",
+            "info": {"total_layer": 120, "current_layer": 31},
+        },
+        "display_status": {"progress": 0.27, "message": None},
+        "heater_bed": {"temperature": 59.98, "target": 60.0, "power": 0.312},
+        "extruder": {
+            "temperature": 214.87,
+            "target": 215.0,
+            "power": 0.533,
+            "can_extrude": True,
+            "pressure_advance": 0.045,
+            "smooth_time": 0.04,
+        },
+        "extruder1": {
+            "temperature": 24.1,
+            "target": 0.0,
+            "power": 0.0,
+            "can_extrude": False,
+            "pressure_advance": 0.05,
+            "smooth_time": 0.04,
+        },
+        "toolhead": {
+            "homed_axes": "xyz",
+            "axis_minimum": [0.0, 0.0, -2.0, 0.0],
+            "axis_maximum": [235.0, 235.0, 250.0, 0.0],
+            "position": [112.3, 98.1, 6.2, 1532.6],
+            "max_velocity": 300.0,
+            "max_accel": 3000.0,
+            "max_accel_to_decel": 1500.0,
+            "square_corner_velocity": 5.0,
+            "extruder": "extruder",
+            "stalls": 0,
+        },
+        "fan": {"speed": 1.0, "rpm": None},
+        "heater_fan hotend_fan": {"speed": 1.0, "rpm": None},
+        "temperature_sensor mcu": {
+            "temperature": 41.2,
+            "measured_min_temp": 28.1,
+            "measured_max_temp": 44.0,
+        },
+        "filament_switch_sensor runout": {"filament_detected": True, "enabled": True},
+    }
+
+
+def frames(seconds: int, seed: int):
+    rng = random.Random(seed)
+    status = snapshot()
+    yield {"jsonrpc": "2.0", "result": {"connection_id": 140266013052992}, "id": 1}
+    yield {"jsonrpc": "2.0", "result": {"objects": OBJECTS}, "id": 2}
+    yield {
+        "jsonrpc": "2.0",
+        "result": {"eventtime": round(START - 0.098, 3), "status": status},
+        "id": 3,
+    }
+    extruder = status["extruder"]["temperature"]
+    bed = status["heater_bed"]["temperature"]
+    mcu = status["temperature_sensor mcu"]["temperature"]
+    stats = status["print_stats"]
+    position = list(status["toolhead"]["position"])
+    progress = status["display_status"]["progress"]
+    for tick in range(seconds * 4):
+        eventtime = START + 0.25 * (tick + 1)
+        extruder += rng.gauss((215.0 - extruder) * 0.2, 0.08)
+        delta = {
+            "extruder": {
+                "temperature": round(extruder, 2),
+                "power": round(rng.uniform(0.45, 0.58), 3),
+            }
+        }
+        if tick % 2 == 0:
+            bed += rng.gauss((60.0 - bed) * 0.1, 0.03)
+            delta["heater_bed"] = {
+                "temperature": round(bed, 2),
+                "power": round(rng.uniform(0.28, 0.34), 3),
+            }
+        if rng.random() < 0.75:
+            position[0] = round(rng.uniform(60.0, 175.0), 3)
+            position[1] = round(rng.uniform(60.0, 175.0), 3)
+            position[3] = round(position[3] + rng.uniform(0.1, 0.9), 4)
+            if tick % 240 == 239:
+                position[2] = round(position[2] + 0.2, 1)
+            delta["toolhead"] = {"position": list(position)}
+        if rng.random() < 0.1:
+            mcu += rng.gauss(0, 0.4)
+            delta["temperature_sensor mcu"] = {"temperature": round(mcu, 2)}
+        if tick % 4 == 3:
+            stats["total_duration"] = round(stats["total_duration"] + 1, 1)
+            stats["print_duration"] = round(stats["print_duration"] + 1, 1)
+            delta["print_stats"] = {
+                "total_duration": stats["total_duration"],
+                "print_duration": stats["print_duration"],
+                "filament_used": position[3],
+            }
+        if tick % 16 == 15:
+            progress = round(progress + 0.004, 3)
+            delta["display_status"] = {"progress": progress}
+        yield {
+            "jsonrpc": "2.0",
+            "method": "notify_status_update",
+            "params": [delta, eventtime],
+        }
+        if tick % 4 == 3:
+            yield proc_stat(rng, TIME_BASE + eventtime - START)
+
+
+def proc_stat(rng: random.Random, now: float) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": "notify_proc_stat_update",
+        "params": [
+            {
+                "moonraker_stats": {
+                    "time": round(now, 2),
+                    "cpu_usage": round(rng.uniform(2.0, 9.0), 2),
+                    "memory": 41324,
+                    "mem_units": "kB",
+                },
+                "cpu_temp": round(rng.uniform(48.0, 52.0), 2),
+                "network": {
+                    "lo": {
+                        "rx_bytes": 212341,
+                        "tx_bytes": 212341,
+                        "bandwidth": round(rng.uniform(100.0, 700.0), 2),
+                    },
+                    "wlan0": {
+                        "rx_bytes": 99812431,
+                        "tx_bytes": 31241231,
+                        "bandwidth": round(rng.uniform(3000.0, 8000.0), 2),
+                    },
+                },
+                "system_cpu_usage": {
+                    f"cpu{core}" if core >= 0 else "cpu": round(
+                        rng.uniform(8.0, 25.0), 1
+                    )
+                    for core in range(-1, 4)
+                },
+                "system_memory": {
+                    "total": 3906716,
+                    "available": 3242408,
+                    "used": 664308,
+                },
+                "websocket_connections": 3,
+            }
+        ],
+    }
+
+
+def main(args) -> None:
+    with open(args.output, "w", encoding="utf-8") as fixture:
+        for frame in frames(args.seconds, args.seed):
+            fixture.write(json.dumps(frame, separators=(",", ":")) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=FIXTURE)
+    main(parser.parse_args())
@@ -0,0 +1,504 @@
+"""Local stand-in Moonraker server for offline load and latency testing
+
+Implements the subset of the Moonraker API used by MoonrakerClient:
+
+    GET  /server/info
+    GET  /server/temperature_store
+    GET  /printer/objects/list
+    GET  /printer/objects/query
+    POST /printer/gcode/script
+    WS   /websocket  (server.connection.identify, server.info,
+                      server.temperature_store, printer.objects.list,
+                      printer.objects.query, printer.objects.subscribe,
+                      printer.gcode.script)
+
+Heater, toolhead and print_stats streams are synthetic and seeded, so runs
+are reproducible. Many instances can run in one process:
+
+    python benchmarks/simulator.py --count 100 --base-port 7125 --rate 4 \\
+        --drop-every 30
+"""
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import random
+import re
+import time
+
+from aiohttp import WSMsgType, web
+
+_LOGGER = logging.getLogger(__name__)
+
+OBJECTS = (
+    "webhooks",
+    "print_stats",
+    "display_status",
+    "toolhead",
+    "extruder",
+    "heater_bed",
+    "fan",
+    "heater_fan hotend_fan",
+)
+
+GCODE_PARAM = re.compile(r"(\w+)=(\S+)")
+HEATERS = ("extruder", "heater_bed")
+# Moonraker keeps 20 minutes of heater samples, one per second
+TEMPERATURE_STORE_SIZE = 1200
+
+
+class SimulatedPrinter:
+    """Synthetic Klipper state advanced at every tick"""
+
+    def __init__(self, seed: int = 0) -> None:
+        self._rng = random.Random(seed)
+        self.eventtime = 0.0
+        self._stored_at = 0
+        self.temperature_store = {
+            name: {
+                field: collections.deque(maxlen=TEMPERATURE_STORE_SIZE)
+                for field in ("temperatures", "targets", "powers")
+            }
+            for name in HEATERS
+        }
+        self.status = {
+            "webhooks": {"state": "ready", "state_message": "Printer is ready"},
+            "print_stats": {
+                "filename": "benchy.gcode",
+                "total_duration": 0.0,
+                "print_duration": 0.0,
+                "filament_used": 0.0,
+                "state": "printing",
+                "message": "",
+            },
+            "display_status": {"progress": 0.0, "message": None},
+            "toolhead": {
+                "homed_axes": "xyz",
+                "position": [0.0, 0.0, 0.2, 0.0],
+                "max_velocity": 300.0,
+                "max_accel": 3000.0,
+                "max_accel_to_decel": 1500.0,
+                "square_corner_velocity": 5.0,
+                "extruder": "extruder",
+                "stalls": 0,
+            },
+            "extruder": {
+                "temperature": 22.0,
+                "target": 215.0,
+                "power": 0.0,
+                "can_extrude": False,
+                "pressure_advance": 0.04,
+                "smooth_time": 0.04,
+            },
+            "heater_bed": {"temperature": 22.0, "target": 60.0, "power": 0.0},
+            "fan": {"speed": 0.0, "rpm": None},
+            "heater_fan hotend_fan": {"speed": 1.0, "rpm": None},
+        }
+
+    def tick(self, elapsed: float) -> dict:
+        """Advance the simulation, return the changed fields by object"""
+        self.eventtime += elapsed
+        changes = {}
+        for name in HEATERS:
+            heater = self.status[name]
+            error = heater["target"] - heater["temperature"]
+            power = max(0.0, min(1.0, error / 10.0 + 0.3 if heater["target"] else 0))
+            temperature = heater["temperature"] + error * min(1.0, elapsed / 8.0)
+            temperature += self._rng.uniform(-0.1, 0.1)
+            changes[name] = {
+                "temperature": round(temperature, 2),
+                "power": round(power, 3),
+            }
+            if name == "extruder":
+                changes[name]["can_extrude"] = temperature > 170
+        if self.status["print_stats"]["state"] == "printing":
+            position = list(self.status["toolhead"]["position"])
+            position[0] = round(self._rng.uniform(20, 200), 3)
+            position[1] = round(self._rng.uniform(20, 200), 3)
+            position[3] = round(position[3] + self._rng.uniform(0.1, 1.0), 4)
+            changes["toolhead"] = {"position": position}
+            stats = self.status["print_stats"]
+            changes["print_stats"] = {
+                "total_duration": round(stats["total_duration"] + elapsed, 3),
+                "print_duration": round(stats["print_duration"] + elapsed, 3),
+                "filament_used": position[3],
+            }
+            progress = self.status["display_status"]["progress"]
+            changes["display_status"] = {
+                "progress": round(min(1.0, progress + elapsed / 3600), 4)
+            }
+        for name, fields in changes.items():
+            self.status[name].update(fields)
+        while self._stored_at < int(self.eventtime):
+            self._stored_at += 1
+            for name in HEATERS:
+                heater, store = self.status[name], self.temperature_store[name]
+                store["temperatures"].append(heater["temperature"])
+                store["targets"].append(heater["target"])
+                store["powers"].append(heater["power"])
+        return changes
+
+    def gcode(self, script: str) -> dict:
+        """Apply the subset of G-code sent by the entities
+
+        Returns the changed fields by object, like tick().
+        """
+        before = {name: dict(fields) for name, fields in self.status.items()}
+        for line in script.splitlines():
+            words = line.split()
+            if not words:
+                continue
+            command = words[0].upper()
+            params = dict(GCODE_PARAM.findall(line))
+            if command == "SET_HEATER_TEMPERATURE":
+                heater = self.status.get(params.get("HEATER", ""))
+                if heater is not None:
+                    heater["target"] = float(params.get("TARGET", 0))
+            elif command == "SET_VELOCITY_LIMIT":
+                toolhead = self.status["toolhead"]
+                for param, field in (
+                    ("ACCEL", "max_accel"),
+                    ("VELOCITY", "max_velocity"),
+                    ("ACCEL_TO_DECEL", "max_accel_to_decel"),
+                    ("SQUARE_CORNER_VELOCITY", "square_corner_velocity"),
+                ):
+                    if param in params:
+                        toolhead[field] = float(params[param])
+            elif command == "SET_PRESSURE_ADVANCE":
+                extruder = self.status.get(params.get("EXTRUDER", "extruder"))
+                if extruder is not None and "ADVANCE" in params:
+                    extruder["pressure_advance"] = float(params["ADVANCE"])
+            elif command == "M106":
+                speed = next((w[1:] for w in words[1:] if w[:1] == "S"), "255")
+                self.status["fan"]["speed"] = round(float(speed) / 255, 3)
+            elif command == "M107":
+                self.status["fan"]["speed"] = 0.0
+        changes = {}
+        for name, fields in self.status.items():
+            delta = {f: v for f, v in fields.items() if before[name].get(f) != v}
+            if delta:
+                changes[name] = delta
+        return changes
+
+    def query(self, projection: dict) -> dict:
+        """Status of the requested {object: fields or None}"""
+        result = {}
+        for name, fields in projection.items():
+            state = self.status.get(name)
+            if state is None:
+                continue
+            if fields is None:
+                result[name] = dict(state)
+            else:
+                result[name] = {f: state[f] for f in fields if f in state}
+        return result
+
+
+class MoonrakerSimulator:
+    """One simulated Moonraker instance bound to host:port"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        rate: float = 4.0,
+        proc_rate: float = 1.0,
+        drop_every: float = None,
+        seed: int = 0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self._rate = rate
+        self._proc_rate = proc_rate
+        self._drop_every = drop_every
+        self.printer = SimulatedPrinter(seed)
+        self._clients = {}
+        self._runner = None
+        self._tasks = []
+        self._connection_id = 0
+        self.requests = 0
+        self.drops = 0
+
+    async def start(self) -> int:
+        """Start serving and return the bound port"""
+        app = web.Application()
+        app.router.add_get("/server/info", self._http_server_info)
+        app.router.add_get("/server/temperature_store", self._http_temperature_store)
+        app.router.add_get("/printer/objects/list", self._http_objects_list)
+        app.router.add_get("/printer/objects/query", self._http_objects_query)
+        app.router.add_post("/printer/gcode/script", self._http_gcode_script)
+        app.router.add_get("/websocket", self._websocket)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        self._tasks.append(asyncio.create_task(self._status_loop()))
+        self._tasks.append(asyncio.create_task(self._proc_loop()))
+        if self._drop_every:
+            self._tasks.append(asyncio.create_task(self._drop_loop()))
+        return self.port
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.drop()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def drop(self) -> None:
+        """Close every websocket, as a Wi-Fi dropout would"""
+        clients = list(self._clients)
+        self._clients.clear()
+        for websocket in clients:
+            await websocket.close()
+        self.drops += 1 if clients else 0
+
+    @property
+    def klippy_connected(self) -> bool:
+        """Objects are answered in shutdown or error, not once disconnected"""
+        return self.printer.status["webhooks"]["state"] != "disconnected"
+
+    async def klippy(self, state: str) -> None:
+        """Move Klippy to ready, shutdown or disconnected and notify clients
+
+        Klippy restarts drop the subscriptions, clients resubscribe on
+        notify_klippy_ready.
+        """
+        self.printer.status["webhooks"]["state"] = state
+        for websocket in self._clients:
+            self._clients[websocket] = {}
+        method = f"notify_klippy_{state}"
+        await self._broadcast(lambda _projection: {"jsonrpc": "2.0", "method": method})
+
+    def server_info(self) -> dict:
+        return {
+            "klippy_connected": self.klippy_connected,
+            "klippy_state": self.printer.status["webhooks"]["state"],
+            "components": ["klippy_apis", "websockets"],
+            "failed_components": [],
+            "registered_directories": ["config", "gcodes"],
+            "warnings": [],
+            "websocket_count": len(self._clients),
+            "moonraker_version": "v0.7.1-simulator",
+            "missing_klippy_requirements": [],
+            "api_version": [1, 0, 5],
+            "api_version_string": "1.0.5",
+        }
+
+    async def _http_server_info(self, request) -> web.Response:
+        self.requests += 1
+        return web.json_response({"result": self.server_info()})
+
+    def temperature_stores(self) -> dict:
+        return {
+            name: {field: list(values) for field, values in store.items()}
+            for name, store in self.printer.temperature_store.items()
+        }
+
+    async def _http_temperature_store(self, request) -> web.Response:
+        self.requests += 1
+        return web.json_response({"result": self.temperature_stores()})
+
+    async def _http_objects_list(self, request) -> web.Response:
+        self.requests += 1
+        return web.json_response({"result": {"objects": list(OBJECTS)}})
+
+    async def _http_objects_query(self, request) -> web.Response:
+        self.requests += 1
+        if not self.klippy_connected:
+            raise web.HTTPServiceUnavailable(text="Klippy Host not connected")
+        projection = {
+            name: value.split(",") if value else None
+            for name, value in request.query.items()
+        }
+        return web.json_response(
+            {
+                "result": {
+                    "eventtime": self.printer.eventtime,
+                    "status": self.printer.query(projection),
+                }
+            }
+        )
+
+    async def _http_gcode_script(self, request) -> web.Response:
+        self.requests += 1
+        if request.content_type == "application/json":
+            script = (await request.json()).get("script", "")
+        else:
+            script = (await request.post()).get("script", "")
+        await self._broadcast_status(self.printer.gcode(script))
+        return web.json_response({"result": "ok"})
+
+    async def _websocket(self, request) -> web.WebSocketResponse:
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self._clients[websocket] = {}
+        try:
+            async for msg in websocket:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                self.requests += 1
+                response = await self._rpc(websocket, json.loads(msg.data))
+                await websocket.send_str(json.dumps(response))
+        finally:
+            self._clients.pop(websocket, None)
+        return websocket
+
+    async def _rpc(self, websocket, message: dict) -> dict:
+        method = message.get("method")
+        params = message.get("params") or {}
+        if not isinstance(method, str):
+            return {
+                "jsonrpc": "2.0",
+                "error": {"code": -32600, "message": "Invalid Request"},
+                "id": message.get("id"),
+            }
+        if method == "server.connection.identify":
+            self._connection_id += 1
+            result = {"connection_id": self._connection_id}
+        elif method == "server.info":
+            result = self.server_info()
+        elif method == "server.temperature_store":
+            result = self.temperature_stores()
+        elif method == "printer.objects.list":
+            result = {"objects": list(OBJECTS)}
+        elif method.startswith("printer.objects") and not self.klippy_connected:
+            return {
+                "jsonrpc": "2.0",
+                "error": {"code": 503, "message": "Klippy Host not connected"},
+                "id": message.get("id"),
+            }
+        elif method in ("printer.objects.query", "printer.objects.subscribe"):
+            projection = params.get("objects", {})
+            if method == "printer.objects.subscribe":
+                self._clients[websocket] = projection
+            result = {
+                "eventtime": self.printer.eventtime,
+                "status": self.printer.query(projection),
+            }
+        elif method == "printer.gcode.script":
+            # Like Klipper, the effect is notified before the response
+            await self._broadcast_status(self.printer.gcode(params.get("script", "")))
+            result = "ok"
+        else:
+            return {
+                "jsonrpc": "2.0",
+                "error": {"code": -32601, "message": f"Method not found: {method}"},
+                "id": message.get("id"),
+            }
+        return {"jsonrpc": "2.0", "result": result, "id": message.get("id")}
+
+    async def _broadcast(self, build) -> None:
+        for websocket, projection in list(self._clients.items()):
+            message = build(projection)
+            if message is None:
+                continue
+            try:
+                await websocket.send_str(json.dumps(message))
+            except ConnectionError:
+                self._clients.pop(websocket, None)
+
+    async def _status_loop(self) -> None:
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(1 / self._rate)
+            now = time.monotonic()
+            changes = self.printer.tick(now - last)
+            last = now
+            await self._broadcast_status(changes)
+
+    async def _broadcast_status(self, changes: dict) -> None:
+        """notify_status_update of the changes each client subscribed to"""
+        if not changes:
+            return
+
+        def build(projection):
+            status = {}
+            for name, fields in changes.items():
+                if name not in projection:
+                    continue
+                wanted = projection[name]
+                delta = {
+                    f: v for f, v in fields.items() if wanted is None or f in wanted
+                }
+                if delta:
+                    status[name] = delta
+            if not status:
+                return None
+            return {
+                "jsonrpc": "2.0",
+                "method": "notify_status_update",
+                "params": [status, self.printer.eventtime],
+            }
+
+        await self._broadcast(build)
+
+    async def _proc_loop(self) -> None:
+        rng = random.Random(self.port)
+        while True:
+            await asyncio.sleep(1 / self._proc_rate)
+            params = {
+                "moonraker_stats": {
+                    "time": time.time(),
+                    "cpu_usage": round(rng.uniform(1, 8), 2),
+                    "memory": 40960,
+                    "mem_units": "kB",
+                },
+                "cpu_temp": round(rng.uniform(45, 55), 2),
+                "websocket_connections": len(self._clients),
+            }
+            await self._broadcast(
+                lambda _projection: {
+                    "jsonrpc": "2.0",
+                    "method": "notify_proc_stat_update",
+                    "params": [params],
+                }
+            )
+
+    async def _drop_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._drop_every)
+            _LOGGER.info("Simulator %s: dropping websockets", self.port)
+            await self.drop()
+
+
+async def main(args) -> None:
+    simulators = [
+        MoonrakerSimulator(
+            host=args.host,
+            port=args.base_port + index if args.base_port else 0,
+            rate=args.rate,
+            drop_every=args.drop_every,
+            seed=args.seed + index,
+        )
+        for index in range(args.count)
+    ]
+    ports = [await simulator.start() for simulator in simulators]
+    print(f"{len(ports)} simulated Moonraker instances on {args.host}: {ports}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for simulator in simulators:
+            await simulator.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=7125, help="0: random")
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=4.0, help="status updates/s")
+    parser.add_argument(
+        "--drop-every", type=float, default=None, help="drop websockets every N s"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -32,6 +32,9 @@ from homeassistant.const import (
 from .const import (
     DOMAIN,
     CONF_WEBSOCKET,
+    CONF_BACKGROUND_SETUP,
+    DEFAULT_BACKGROUND_SETUP,
+    DATA_FLEET,
     DEFAULT_PORT,
     DEFAULT_NAME,
     DEFAULT_HOST,
@@ -41,6 +44,8 @@ from .const import (
 
 
 from .common_raker import MoonrakerUpdateCoordinator
+from .fleet import MoonrakerFleet
+from .store import PrinterStateStore
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -56,9 +61,22 @@ def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Setup Moonraker Controller from a config entry."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if DATA_FLEET not in data:
+        data[DATA_FLEET] = MoonrakerFleet()
+    fleet = data[DATA_FLEET]
+    coordinator = MoonrakerUpdateCoordinator(hass, entry, POLLING, fleet)
     try:
-        coordinator = MoonrakerUpdateCoordinator(hass, entry, POLLING)
-        await coordinator.async_config_entry_first_refresh()
+        restored = await coordinator.async_restore_state()
+        if restored or entry.data.get(CONF_BACKGROUND_SETUP, DEFAULT_BACKGROUND_SETUP):
+            # Entities start from the cached state or unavailable, an
+            # unreachable printer does not hold the setup back
+            coordinator.async_start_background()
+        elif entry.data.get(CONF_WEBSOCKET) is True:
+            await coordinator.async_websocket_first_refresh()
+            await coordinator.setup_websocket()
+        else:
+            await coordinator.async_config_entry_first_refresh()
 
         hass.data[DOMAIN][entry.entry_id] = coordinator
         for component in PLATFORMS:
@@ -67,6 +85,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             )
         return True
     except Exception as err:
+        await coordinator.async_close()
         _LOGGER.exception(err)
         raise ConfigEntryNotReady from err
 
@@ -82,5 +101,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
     )
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_close()
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop the state cache of a removed Moonraker Controller entry."""
+    await PrinterStateStore(hass, entry.entry_id, None).async_remove()
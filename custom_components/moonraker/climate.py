@@ -3,39 +3,27 @@ import logging
 import copy
 from homeassistant.components.climate import (
     ClimateEntity,
-    ClimateEntityFeature,
     HVACMode,
     HVACAction,
 )
-from homeassistant.const import ATTR_TEMPERATURE, TEMP_CELSIUS
+from homeassistant.const import ATTR_TEMPERATURE
 
 from homeassistant.config_entries import ConfigEntry
 
 from homeassistant.core import HomeAssistant  # , callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 # from homeassistant.helpers.typing import StateType
 from homeassistant.util import slugify as util_slugify
 from .common_raker import MoonrakerUpdateCoordinator
-from .const import DOMAIN, CLIMATES_LIST, CONF_PRINTER_EXTRUDERS
-
-CLIMATE_EXTRUDERS_MODELS = {
-    "component": "extruder",
-    "climate_type": "temperature",
-    "climate_target": "target",
-    "climate_power": "power",
-    "name": "Extruder",
-    "attr_icon": "mdi:printer-3d-nozzle",
-    "temperature_unit": TEMP_CELSIUS,
-    "max_temp": 300,
-    "min_temp": 0,
-    "target_temperature_step": 1,
-    "gcode": "SET_HEATER_TEMPERATURE HEATER=extruder TARGET={:.0f}",
-    "fan_mode": ClimateEntityFeature.FAN_MODE,
-    "mode": ClimateEntityFeature.TARGET_TEMPERATURE,
-}
+from .entity import MoonrakerEntity
+from .const import (
+    DOMAIN,
+    CLIMATES_LIST,
+    CLIMATE_EXTRUDERS_MODELS,
+    CONF_PRINTER_EXTRUDERS,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -61,13 +49,21 @@ async def async_setup_entry(
     async_add_entities(entities)
 
 
-class MoonrakerClimateBase(CoordinatorEntity, ClimateEntity):
+class MoonrakerClimateBase(MoonrakerEntity, ClimateEntity):
     """Moonraker Climate Base entity"""
 
     def __init__(self, coordinator: MoonrakerUpdateCoordinator, param) -> None:
 
         """Initialize the number."""
-        super().__init__(coordinator)
+        super().__init__(
+            coordinator,
+            [
+                (param["component"], param["climate_type"]),
+                (param["component"], param["climate_target"]),
+                (param["component"], param["climate_power"]),
+            ],
+            param.get("deadband"),
+        )
         self._climate_type = param["climate_type"]
         self._climate_target = param["climate_target"]
         self._climate_power = param["climate_power"]
@@ -121,6 +117,9 @@ class MoonrakerClimateBase(CoordinatorEntity, ClimateEntity):
             else HVACMode.OFF
         )
 
+    def _deadband_values(self) -> tuple:
+        return (self.current_temperature, self.target_temperature, self.hvac_action)
+
     @property
     def device_info(self) -> DeviceInfo:
         return self.coordinator.moonraker.printer.device_info
@@ -130,8 +129,14 @@ class MoonrakerClimateBase(CoordinatorEntity, ClimateEntity):
         _LOGGER.debug(self._gcode.format(kwargs[ATTR_TEMPERATURE]))
         _LOGGER.debug("ClimateEntity :%s", self._climate_type)
         try:
-            await self.coordinator.moonraker.push_data(
-                self._gcode.format(kwargs[ATTR_TEMPERATURE])
+            await self.coordinator.async_send_gcode(
+                self._gcode.format(kwargs[ATTR_TEMPERATURE]),
+                key=(self._component, self._gcode),
+                optimistic=(
+                    self._component,
+                    self._climate_target,
+                    kwargs[ATTR_TEMPERATURE],
+                ),
             )
         except Exception as err:
             _LOGGER.error(
@@ -0,0 +1,51 @@
+""" JSON codec for the Moonraker wire format, orjson when available """
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+
+    def loads(data):
+        """Decode a str or bytes frame"""
+        return orjson.loads(data)
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+else:
+    BACKEND = "json"
+
+    def loads(data):
+        """Decode a str or bytes frame"""
+        return json.loads(data)
+
+    def dumps(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
+
+class StaticRequest:
+    """JSON-RPC request encoded once, only the id is appended per send"""
+
+    __slots__ = ("method", "params", "_prefix")
+
+    def __init__(self, method: str, params: dict = None) -> None:
+        self.method = method
+        self.params = params
+        prefix = '{"jsonrpc":"2.0","method":' + dumps(method)
+        if params is not None:
+            prefix += ',"params":' + dumps(params)
+        self._prefix = prefix + ',"id":'
+
+    def encode(self, req_id: int) -> str:
+        return f"{self._prefix}{req_id}}}"
+
+
+def encode_request(method: str, req_id: int, params: dict = None) -> str:
+    message = {"jsonrpc": "2.0", "method": method, "id": req_id}
+    if params is not None:
+        message["params"] = params
+    return dumps(message)
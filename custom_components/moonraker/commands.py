@@ -0,0 +1,132 @@
+""" Outbound G-code queue """
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from .const import BLOCKING_GCODES, COMMAND_QUEUE_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Command:
+    """Queued G-code and the callers waiting for it"""
+
+    __slots__ = ("key", "gcode", "futures", "blocking")
+
+    def __init__(self, key, gcode: str, future: asyncio.Future) -> None:
+        self.key = key
+        self.gcode = gcode
+        self.futures = [future]
+        self.blocking = is_blocking(gcode)
+
+
+class CommandQueue:
+    """Per-printer G-code queue sending one newline-joined script per batch
+
+    A command with a key replaces the pending command with the same key
+    (last write wins), unless an unkeyed command was queued in between:
+    unkeyed commands are barriers and keep their relative ordering.
+    Blocking commands (homing, heat and wait) are barriers sent on their
+    own. Klipper stops a script at its first failing line, so one failing
+    command fails every caller of its batch.
+    """
+
+    def __init__(
+        self, send: Callable[[str], Awaitable[bool]], delay: float = COMMAND_QUEUE_DELAY
+    ) -> None:
+        self._send = send
+        self._delay = delay
+        self._pending = []
+        self._batch = []
+        self._worker = None
+
+    @property
+    def depth(self) -> int:
+        """Number of commands waiting to be sent"""
+        return len(self._pending)
+
+    async def send(self, gcode: str, key=None) -> bool:
+        """Queue gcode and wait for the result of the script carrying it"""
+        future = asyncio.get_running_loop().create_future()
+        if not self._collapse(key, gcode, future):
+            self._pending.append(_Command(key, gcode, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return await future
+
+    def _collapse(self, key, gcode: str, future: asyncio.Future) -> bool:
+        if key is None or is_blocking(gcode):
+            return False
+        for command in reversed(self._pending):
+            if command.key is None or command.blocking:
+                return False
+            if command.key == key:
+                _LOGGER.debug("Superseded %s by %s", command.gcode, gcode)
+                command.gcode = gcode
+                command.futures.append(future)
+                return True
+        return False
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                await asyncio.sleep(self._delay)
+                self._batch = _next_batch(self._pending)
+                self._pending = self._pending[len(self._batch) :]
+                try:
+                    result = await self._send(
+                        "\n".join(cmd.gcode for cmd in self._batch)
+                    )
+                except Exception as err:  # pylint: disable=broad-except
+                    _resolve(self._batch, exception=err)
+                else:
+                    _resolve(self._batch, result=result)
+                self._batch = []
+        except asyncio.CancelledError:
+            # In flight and queued callers must not wait forever
+            error = ConnectionError("Command queue closed")
+            _resolve(self._batch, exception=error)
+            _resolve(self._pending, exception=error)
+            self._batch = []
+            self._pending = []
+            raise
+
+    async def close(self) -> None:
+        """Stop sending, pending callers get a ConnectionError"""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        _resolve(self._pending, exception=ConnectionError("Command queue closed"))
+        self._pending = []
+
+
+def is_blocking(gcode: str) -> bool:
+    """True if a line of gcode waits for homing or a temperature"""
+    for line in gcode.splitlines():
+        words = line.split(maxsplit=1)
+        if words and words[0].upper() in BLOCKING_GCODES:
+            return True
+    return False
+
+
+def _next_batch(pending: list) -> list:
+    """Leading commands to send as one script, a blocking one goes alone"""
+    if pending[0].blocking:
+        return pending[:1]
+    for index, command in enumerate(pending):
+        if command.blocking:
+            return pending[:index]
+    return pending
+
+
+def _resolve(commands: list, result=None, exception: Exception = None) -> None:
+    """Complete the futures of commands still waiting"""
+    for command in commands:
+        for future in command.futures:
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
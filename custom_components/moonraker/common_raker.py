@@ -1,10 +1,13 @@
 """Example integration using DataUpdateCoordinator."""
 from datetime import timedelta
 import logging
+from typing import Callable
 import async_timeout
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
 
 # from homeassistant.exceptions import ConfigEntryAuthFailed,IntegrationError
 from homeassistant.helpers.update_coordinator import (
@@ -25,8 +28,20 @@ from homeassistant.const import (
 from .const import (
     CONF_WEBSOCKET,
     CONF_PRINTER_OBJECTS,
+    CONF_PRINTER_EXTRUDERS,
+    CONF_PRINTER_HEATER_FAN,
+    CONF_PRINTER_FILAMENT_SWITCH_SENSOR,
+    OPTIMISTIC_TIMEOUT,
+    RESTORE_GRACE_PERIOD,
+    TRANSPORT_PROBE_INTERVAL,
+    WS_REQUEST_TIMEOUT,
 )
 from .moonraker_client import MoonrakerClient, Printer
+from .scheduler import PollingScheduler
+from .fleet import MoonrakerFleet
+from .commands import CommandQueue
+from .metrics import PrinterMetrics
+from .store import PrinterStateStore
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -39,7 +54,11 @@ class MoonrakerUpdateCoordinator(DataUpdateCoordinator):
     config_entry: ConfigEntry
 
     def __init__(
-        self, hass: HomeAssistant, config_entry: ConfigEntry, interval: int
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        interval: int,
+        fleet: MoonrakerFleet = None,
     ) -> None:
         """Initialize my coordinator."""
         if config_entry.data.get(CONF_WEBSOCKET) is False:
@@ -70,22 +89,290 @@ class MoonrakerUpdateCoordinator(DataUpdateCoordinator):
             config_entry.data.get(CONF_USERNAME),
             config_entry.data.get(CONF_PASSWORD),
             config_entry.data.get(CONF_PRINTER_OBJECTS),
+            config_entry.data.get(CONF_PRINTER_EXTRUDERS),
+            config_entry.data.get(CONF_PRINTER_HEATER_FAN),
+            config_entry.data.get(CONF_PRINTER_FILAMENT_SWITCH_SENSOR),
         )
         self.config_entry = config_entry
+        self._scheduler = PollingScheduler(idle=interval)
+        self._fleet = fleet if fleet is not None else MoonrakerFleet()
+        self._fleet.register(config_entry.entry_id)
+        self._commands = CommandQueue(self.moonraker.push_data)
+        self._unsub_probe = None
+        self._connect_task = None
+        self._optimistic_expiry: dict[tuple, CALLBACK_TYPE] = {}
+        self._state_store = PrinterStateStore(
+            hass, config_entry.entry_id, self.printer
+        )
+        self.restored = False
+        self._unsub_grace = None
+        self.printer.metrics.transport = (
+            "websocket" if self.update_interval is None else "http"
+        )
+        self._field_listeners: dict[tuple, set[CALLBACK_TYPE]] = {}
+        self._projection_debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=1,
+            immediate=False,
+            function=self._async_update_projection,
+        )
+
+    @callback
+    def async_add_field_listener(
+        self, fields, update_callback: CALLBACK_TYPE
+    ) -> Callable[[], None]:
+        """Call update_callback when one of the (component, attribute) fields changes"""
+        fields = tuple(fields)
+        for field in fields:
+            self._field_listeners.setdefault(field, set()).add(update_callback)
+        self.hass.async_create_task(self._projection_debouncer.async_call())
+
+        @callback
+        def remove_listener() -> None:
+            for field in fields:
+                listeners = self._field_listeners.get(field)
+                if listeners is not None:
+                    listeners.discard(update_callback)
+                    if not listeners:
+                        del self._field_listeners[field]
+            self.hass.async_create_task(self._projection_debouncer.async_call())
+
+        return remove_listener
+
+    async def _async_update_projection(self) -> None:
+        """Narrow queries and subscription to the fields of enabled entities"""
+        if self.moonraker.set_fields(self._field_listeners.keys()):
+            await self.moonraker.resubscribe()
+
+    @callback
+    def async_update_fields(self, changes: set) -> None:
+        """Push changed fields to the entities reading them only"""
+        self._state_store.async_schedule_save()
+        if not self.last_update_success or self.restored:
+            # Availability or assumed state changes, every entity has to
+            # write its state
+            self.restored = False
+            self.printer.metrics.notified(len(self._listeners))
+            self.async_set_updated_data(True)
+            return
+        self.data = True
+        targets = set()
+        for field in changes:
+            targets.update(self._field_listeners.get(field, ()))
+        self.printer.metrics.notified(len(targets))
+        for update_callback in targets:
+            update_callback()
 
     async def _async_update_data(self):
         """Fetch data from API endpoint."""
         try:
             # Note: asyncio.TimeoutError and aiohttp.ClientError are already
             # handled by the data update coordinator.
-            async with async_timeout.timeout(10):
-                return await self.moonraker.fetch_data()
+            entry_id = self.config_entry.entry_id
+            async with self._fleet.slot():
+                async with async_timeout.timeout(self._fleet.timeout(entry_id)):
+                    result = await self.moonraker.fetch_data()
+            # Polling refreshes every entity, drop the per field changes
+            self.printer.pop_changes()
+            self.printer.metrics.notified(len(self._listeners))
+            self.restored = False
+            self._state_store.async_schedule_save()
+            self._fleet.record(entry_id, True)
+            self._scheduler.success()
+            self._reschedule()
+            return result
         except Exception as err:
+            self._fleet.record(self.config_entry.entry_id, False)
+            self._scheduler.failure()
+            self._reschedule()
             _LOGGER.exception(err)
             raise UpdateFailed(f"Error communicating with API: {err}") from err
 
+    def _reschedule(self) -> None:
+        """Adapt the polling interval and align it on the fleet phase"""
+        if self.update_interval is not None:
+            interval = self._scheduler.interval(self.printer)
+            self.update_interval = timedelta(
+                seconds=self._fleet.align(self.config_entry.entry_id, interval)
+            )
+
+    @property
+    def metrics(self) -> PrinterMetrics:
+        """Printer metrics with the current command queue depth"""
+        metrics = self.printer.metrics
+        metrics.queue_depth = self._commands.depth
+        return metrics
+
+    @property
+    def command_queue(self) -> CommandQueue:
+        return self._commands
+
+    async def async_send_gcode(self, gcode: str, key=None, optimistic=None) -> bool:
+        """Queue G-code and poll fast for a while to show its effect
+
+        Pending commands sharing the same key collapse to the latest one.
+        optimistic is a (component, attribute, value) shown right away and
+        reconciled with the next status update reporting that field.
+        """
+        if optimistic is not None:
+            self.printer.set_optimistic(*optimistic)
+            self.async_update_fields(self.printer.pop_changes())
+            field = tuple(optimistic[:2])
+            cancel = self._optimistic_expiry.pop(field, None)
+            if cancel is not None:
+                cancel()
+            self._optimistic_expiry[field] = async_call_later(
+                self.hass, OPTIMISTIC_TIMEOUT, self._async_expire_optimistic(field)
+            )
+        try:
+            result = await self._commands.send(gcode, key)
+        except Exception:
+            if optimistic is not None:
+                self._rollback(optimistic)
+            raise
+        if not result and optimistic is not None:
+            self._rollback(optimistic)
+        if self.update_interval is not None:
+            self._scheduler.boost()
+            self._reschedule()
+            self._schedule_refresh()
+        return result
+
+    @callback
+    def _rollback(self, optimistic) -> None:
+        self.printer.rollback_optimistic(optimistic[0], optimistic[1])
+        self.async_update_fields(self.printer.pop_changes())
+
+    def _async_expire_optimistic(self, field: tuple):
+        @callback
+        def _expire(_now) -> None:
+            self._optimistic_expiry.pop(field, None)
+            self.printer.expire_optimistic()
+            changes = self.printer.pop_changes()
+            if changes:
+                self.async_update_fields(changes)
+
+        return _expire
+
+    def unregister(self) -> None:
+        """Leave the fleet schedule"""
+        self._fleet.unregister(self.config_entry.entry_id)
+
+    async def async_close(self) -> None:
+        """Stop probing, leave the fleet and close the connections"""
+        if self._connect_task is not None and not self._connect_task.done():
+            self._connect_task.cancel()
+        if self._unsub_probe is not None:
+            self._unsub_probe()
+            self._unsub_probe = None
+        for cancel in self._optimistic_expiry.values():
+            cancel()
+        self._optimistic_expiry.clear()
+        self._projection_debouncer.async_cancel()
+        if self._unsub_grace is not None:
+            self._unsub_grace()
+            self._unsub_grace = None
+        self.unregister()
+        await self._state_store.async_flush()
+        await self._commands.close()
+        await self.moonraker.close()
+
+    async def async_restore_state(self) -> bool:
+        """Start from the state cached before the restart, True if found"""
+        if not await self._state_store.async_restore():
+            return False
+        self.printer.pop_changes()
+        self.restored = True
+        self.data = True
+        self._unsub_grace = async_call_later(
+            self.hass, RESTORE_GRACE_PERIOD, self._async_end_restore_grace
+        )
+        return True
+
+    @property
+    def restored_available(self) -> bool:
+        """True while the restored state is shown despite failed updates
+
+        Until the first successful update or RESTORE_GRACE_PERIOD seconds.
+        """
+        return self.restored and self._unsub_grace is not None
+
+    @callback
+    def _async_end_restore_grace(self, _now) -> None:
+        self._unsub_grace = None
+        if self.restored:
+            # Still nothing from the printer, show it unavailable
+            self.async_update_listeners()
+
+    @callback
+    def async_start_background(self) -> None:
+        """Connect in a background task instead of blocking the entry setup
+
+        Without a restored state entities stay unavailable until the first
+        data arrives.
+        """
+        if not self.restored:
+            self.last_update_success = False
+        if self._connect_task is None:
+            self._connect_task = self.hass.async_create_task(self.async_connect())
+
+    async def async_connect(self) -> None:
+        """Go live without raising
+
+        The websocket supervisor retries and falls back to HTTP polling,
+        polling retries on its interval.
+        """
+        if self.config_entry.data.get(CONF_WEBSOCKET) is True:
+            await self.setup_websocket()
+        else:
+            await self.async_refresh()
+
+    async def async_websocket_first_refresh(self) -> None:
+        """First data from the websocket subscription instead of HTTP"""
+        async with self._fleet.slot():
+            subscribed = await self.moonraker.websocket_bootstrap(self)
+        if not subscribed:
+            raise UpdateFailed("Websocket subscription failed")
+        self._fleet.record(self.config_entry.entry_id, True)
+
     async def setup_websocket(self):
-        self.hass.async_create_task(self.moonraker.websockets_loop(self))
+        self.moonraker.start_websocket(self)
+        if self._unsub_probe is None:
+            self._unsub_probe = async_track_time_interval(
+                self.hass,
+                self._async_probe,
+                timedelta(seconds=TRANSPORT_PROBE_INTERVAL),
+            )
+
+    @callback
+    def async_set_push(self, active: bool) -> None:
+        """Poll over HTTP while the websocket is down, stop once it is back"""
+        if active and self.update_interval is not None:
+            _LOGGER.info("%s: websocket healthy, using push", self.moonraker.name)
+            self.update_interval = None
+            if self._unsub_refresh:
+                self._unsub_refresh()
+                self._unsub_refresh = None
+            self.printer.metrics.transport = "websocket"
+        elif not active and self.update_interval is None:
+            _LOGGER.info("%s: websocket down, polling over HTTP", self.moonraker.name)
+            self.update_interval = timedelta(
+                seconds=self._scheduler.interval(self.printer)
+            )
+            self._schedule_refresh()
+            self.printer.metrics.transport = "http"
+
+    async def _async_probe(self, _now) -> None:
+        """Measure the round trip, drop a websocket that stopped answering"""
+        try:
+            async with async_timeout.timeout(WS_REQUEST_TIMEOUT):
+                await self.moonraker.probe()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("%s: probe failed: %s", self.moonraker.name, err)
+            self.printer.metrics.rtt = None
+            if self.moonraker.websocket_connected:
+                await self.moonraker.reset_websocket()
 
     @property
     def listeners(self):
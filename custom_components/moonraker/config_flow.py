@@ -25,6 +25,8 @@ from .const import (
     DOMAIN,
     #    PLATFORMS,
     CONF_WEBSOCKET,
+    CONF_BACKGROUND_SETUP,
+    DEFAULT_BACKGROUND_SETUP,
     CONF_PRINTER_OBJECTS,
     DEFAULT_PRINTER_OBJECTS,
     CONF_PRINTER_HEATER_FAN,
@@ -57,6 +59,11 @@ DATA_SCHEMA = vol.Schema(
         ): str,
         vol.Optional(CONF_SSL, default=False, description="SSL Enable"): bool,
         vol.Optional(CONF_WEBSOCKET, default=False, description=" Use websocket"): bool,
+        vol.Optional(
+            CONF_BACKGROUND_SETUP,
+            default=DEFAULT_BACKGROUND_SETUP,
+            description="Connect in the background",
+        ): bool,
         vol.Optional(
             CONF_USERNAME, default="Your username", description="The username used"
         ): str,
@@ -102,13 +109,16 @@ async def validate_input(hass: HomeAssistant, data: dict) -> dict[str, Any]:
         data[CONF_PASSWORD],
         data[CONF_PRINTER_OBJECTS],
     )
-    result = await mrclient.server_info()
-    if not result:
-        raise CannotConnect
-    if (data[CONF_WEBSOCKET]) is True:
-        wsc = await mrclient.websockets_test()
-        if not wsc:
+    try:
+        result = await mrclient.server_info()
+        if not result:
             raise CannotConnect
+        if (data[CONF_WEBSOCKET]) is True:
+            wsc = await mrclient.websockets_test()
+            if not wsc:
+                raise CannotConnect
+    finally:
+        await mrclient.close()
     return {"title": mrclient.printer_id}
 
 
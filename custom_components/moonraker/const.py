@@ -13,6 +13,8 @@ ISSUE_URL = "https://github.com/xp4ndeR/Moonraker_Controller/issues"
 
 
 CONF_WEBSOCKET = "websocket"
+CONF_BACKGROUND_SETUP = "background_setup"
+DEFAULT_BACKGROUND_SETUP = False
 CONF_PRINTER_OBJECTS = "printer_objects"
 DEFAULT_PRINTER_OBJECTS = [
     "display_status",
@@ -35,6 +37,38 @@ DEFAULT_PORT = "7125"
 DEFAULT_NAME = "MyPrinter"
 DEFAULT_HOST = "192.168.10.16"
 POLLING = 60
+POLLING_ACTIVE = 5
+POLLING_BOOST = 1
+POLLING_BOOST_DURATION = 10
+POLLING_BACKOFF_MAX = 600
+DATA_FLEET = "fleet"
+FLEET_CONCURRENCY = 4
+FLEET_TIMEOUT_MIN = 2
+HTTP_CONNECTION_LIMIT = 4
+HTTP_KEEPALIVE_TIMEOUT = 30
+HTTP_TIMEOUT = 10
+WS_REQUEST_TIMEOUT = 10
+WS_RECONNECT_MIN = 1
+WS_RECONNECT_MAX = 60
+WS_COALESCE_WINDOW = 0.25
+INGEST_QUEUE_SIZE = 64
+TRANSPORT_PROBE_INTERVAL = 30
+LOG_FRAME_SAMPLE = 100
+COMMAND_QUEUE_DELAY = 0.1
+# Homing and heat-and-wait scripts run for minutes
+GCODE_TIMEOUT = 600
+# Sent on their own, never batched with other commands
+BLOCKING_GCODES = ("G28", "M109", "M190", "TEMPERATURE_WAIT")
+OPTIMISTIC_TIMEOUT = 10
+METRICS_RATE_WINDOW = 11
+STORE_VERSION = 1
+STORE_SAVE_DELAY = 30
+RESTORE_GRACE_PERIOD = 600
+DEADBAND_HEARTBEAT = 60
+HISTORY_SIZE = 1200
+HISTORY_INTERVAL = 1
+HISTORY_WINDOW = 300
+HISTORY_RATE_WINDOW = 60
 PERCENTAGE = "%"
 DISTANCE = "mm"
 
@@ -59,6 +93,7 @@ SENSORS_LIST = (
         "name": "extruder_power",
         "attr_icon": "mdi:printer-3d",
         "unit_of_measurement": PERCENTAGE,
+        "deadband": {"abs": 0.02, "min_interval": 1},
     },
     {
         "component": "display_status",
@@ -66,6 +101,7 @@ SENSORS_LIST = (
         "name": "Progress",
         "attr_icon": "mdi:printer-3d",
         "unit_of_measurement": PERCENTAGE,
+        "deadband": {"abs": 0.001, "min_interval": 5},
     },
     {
         "component": "print_stats",
@@ -80,6 +116,7 @@ SENSORS_LIST = (
         "name": "Position X",
         "attr_icon": "mdi:printer-3d",
         "unit_of_measurement": DISTANCE,
+        "deadband": {"abs": 0.1, "min_interval": 1},
     },
     {
         "component": "toolhead",
@@ -87,6 +124,7 @@ SENSORS_LIST = (
         "name": "Position Z",
         "attr_icon": "mdi:printer-3d",
         "unit_of_measurement": DISTANCE,
+        "deadband": {"abs": 0.1, "min_interval": 1},
     },
     {
         "component": "toolhead",
@@ -94,6 +132,7 @@ SENSORS_LIST = (
         "name": "Position Y",
         "attr_icon": "mdi:printer-3d",
         "unit_of_measurement": DISTANCE,
+        "deadband": {"abs": 0.1, "min_interval": 1},
     },
     {
         "component": "toolhead",
@@ -127,6 +166,208 @@ CLIMATES_LIST = (
         "gcode": "SET_HEATER_TEMPERATURE HEATER=heater_bed TARGET={:.0f}",
         "fan_mode": ClimateEntityFeature.FAN_MODE,
         "mode": ClimateEntityFeature.TARGET_TEMPERATURE,
+        "deadband": {"abs": 0.1, "min_interval": 1},
+    },
+)
+
+CLIMATE_EXTRUDERS_MODELS = {
+    "component": "extruder",
+    "climate_type": "temperature",
+    "climate_target": "target",
+    "climate_power": "power",
+    "name": "Extruder",
+    "attr_icon": "mdi:printer-3d-nozzle",
+    "temperature_unit": TEMP_CELSIUS,
+    "max_temp": 300,
+    "min_temp": 0,
+    "target_temperature_step": 1,
+    "gcode": "SET_HEATER_TEMPERATURE HEATER=extruder TARGET={:.0f}",
+    "fan_mode": ClimateEntityFeature.FAN_MODE,
+    "mode": ClimateEntityFeature.TARGET_TEMPERATURE,
+    "deadband": {"abs": 0.1, "min_interval": 1},
+}
+
+NUMBER_EXTRUDERS_MODELS = {
+    "component": "extruder",
+    "attribut": "pressure_advance",
+    "name": "Pressure advance",
+    "attr_icon": "mdi:printer-3d-nozzle",
+    "unit_of_measurement": "s",
+    "native_max_value": 1,
+    "native_min_value": 0,
+    "native_step": 0.001,
+    "gcode": "SET_PRESSURE_ADVANCE EXTRUDER=extruder ADVANCE={:.3f}",
+    "mode": "box",
+}
+
+NUMBERS_LIST = (
+    {
+        "component": "toolhead",
+        "attribut": "max_accel",
+        "name": "Maximun accel",
+        "attr_icon": "mdi:printer-3d",
+        "unit_of_measurement": "mm/s²",
+        "native_max_value": 10000,
+        "native_min_value": 0,
+        "native_step": 100,
+        "gcode": "SET_VELOCITY_LIMIT ACCEL={:.0f}",
+        "mode": "box",
+    },
+    {
+        "component": "toolhead",
+        "attribut": "max_velocity",
+        "name": "Maximun velocity",
+        "attr_icon": "mdi:printer-3d",
+        "unit_of_measurement": "mm/s",
+        "native_max_value": 10000,
+        "native_min_value": 0,
+        "native_step": 5,
+        "gcode": "SET_VELOCITY_LIMIT VELOCITY={:.0f}",
+        "mode": "box",
+    },
+    {
+        "component": "toolhead",
+        "attribut": "max_accel_to_decel",
+        "name": "maximun accel to decel",
+        "attr_icon": "mdi:printer-3d",
+        "unit_of_measurement": "mm/s²",
+        "native_max_value": 10000,
+        "native_min_value": 0,
+        "native_step": 100,
+        "gcode": "SET_VELOCITY_LIMIT ACCEL_TO_DECEL={:.0f}",
+        "mode": "box",
+    },
+    {
+        "component": "toolhead",
+        "attribut": "square_corner_velocity",
+        "name": "square corner velocity",
+        "attr_icon": "mdi:printer-3d-nozzle",
+        "unit_of_measurement": "mm/s",
+        "native_max_value": 100,
+        "native_min_value": 0,
+        "native_step": 0.1,
+        "gcode": "SET_VELOCITY_LIMIT SQUARE_CORNER_VELOCITY={:.1f}",
+        "mode": "box",
+    },
+    {
+        "component": "fan",
+        "attribut": "speed",
+        "name": "Part fan speed",
+        "attr_icon": "mdi:fan",
+        "unit_of_measurement": PERCENTAGE,
+        "native_max_value": 100,
+        "native_min_value": 0,
+        "native_step": 1,
+        "gcode": "M106 S{:.0f}",  # TODO Convert PCT to 0..255 Range
+        "mode": "box",
+    },
+)
+
+DIAGNOSTIC_SENSORS_LIST = (
+    {
+        "attribut": "frames_per_second",
+        "name": "Frames per second",
+        "attr_icon": "mdi:swap-vertical",
+        "unit_of_measurement": "frames/s",
+    },
+    {
+        "attribut": "bytes_in_per_second",
+        "name": "Bytes in per second",
+        "attr_icon": "mdi:download-network",
+        "unit_of_measurement": "B/s",
+    },
+    {
+        "attribut": "bytes_out_per_second",
+        "name": "Bytes out per second",
+        "attr_icon": "mdi:upload-network",
+        "unit_of_measurement": "B/s",
+    },
+    {
+        "attribut": "parse_time",
+        "name": "Parse time",
+        "attr_icon": "mdi:timer-outline",
+        "unit_of_measurement": "ms",
+    },
+    {
+        "attribut": "fanout_per_second",
+        "name": "Entity updates per second",
+        "attr_icon": "mdi:call-split",
+        "unit_of_measurement": "updates/s",
+    },
+    {
+        "attribut": "command_rtt",
+        "name": "Command round trip",
+        "attr_icon": "mdi:timer-sync-outline",
+        "unit_of_measurement": "ms",
+    },
+    {
+        "attribut": "rtt",
+        "name": "Round trip",
+        "attr_icon": "mdi:timer-sync-outline",
+        "unit_of_measurement": "ms",
+    },
+    {
+        "attribut": "transport",
+        "name": "Transport",
+        "attr_icon": "mdi:transit-connection-variant",
+        "unit_of_measurement": None,
+    },
+    {
+        "attribut": "ingest_depth",
+        "name": "Ingest queue",
+        "attr_icon": "mdi:tray-full",
+        "unit_of_measurement": None,
+    },
+    {
+        "attribut": "ingest_dropped",
+        "name": "Ingest dropped",
+        "attr_icon": "mdi:tray-remove",
+        "unit_of_measurement": None,
+    },
+    {
+        "attribut": "reconnect_count",
+        "name": "Reconnects",
+        "attr_icon": "mdi:connection",
+        "unit_of_measurement": None,
+    },
+    {
+        "attribut": "queue_depth",
+        "name": "Command queue depth",
+        "attr_icon": "mdi:tray-full",
+        "unit_of_measurement": None,
+    },
+)
+
+HISTORY_SENSORS_LIST = (
+    {
+        "attribut": "temperature_mean",
+        "name": "Mean temperature",
+        "attr_icon": "mdi:thermometer",
+        "unit_of_measurement": TEMP_CELSIUS,
+    },
+    {
+        "attribut": "temperature_min",
+        "name": "Min temperature",
+        "attr_icon": "mdi:thermometer-chevron-down",
+        "unit_of_measurement": TEMP_CELSIUS,
+    },
+    {
+        "attribut": "temperature_max",
+        "name": "Max temperature",
+        "attr_icon": "mdi:thermometer-chevron-up",
+        "unit_of_measurement": TEMP_CELSIUS,
+    },
+    {
+        "attribut": "stability",
+        "name": "Temperature stability",
+        "attr_icon": "mdi:chart-bell-curve",
+        "unit_of_measurement": TEMP_CELSIUS,
+    },
+    {
+        "attribut": "heating_rate",
+        "name": "Heating rate",
+        "attr_icon": "mdi:thermometer-chevron-up",
+        "unit_of_measurement": "°C/min",
     },
 )
 
@@ -0,0 +1,80 @@
+""" Significant-change filter for entity state writes """
+import math
+import time
+
+from .const import DEADBAND_HEARTBEAT
+
+
+class Deadband:
+    """Decide whether new field values are worth a state write
+
+    Numeric values within abs_tol or rel_tol of the last written ones are
+    held back, as are writes closer than min_interval to the previous one.
+    Anything else is a transition and always written: a non numeric value
+    changing, a value appearing or going to or from zero (heater on/off).
+    Held back values are due at the next min_interval or heartbeat.
+    """
+
+    __slots__ = ("abs_tol", "rel_tol", "min_interval", "heartbeat", "_last", "_at")
+
+    def __init__(
+        self,
+        abs_tol: float = 0,
+        rel_tol: float = 0,
+        min_interval: float = 0,
+        heartbeat: float = DEADBAND_HEARTBEAT,
+    ) -> None:
+        self.abs_tol = abs_tol
+        self.rel_tol = rel_tol
+        self.min_interval = min_interval
+        self.heartbeat = heartbeat
+        self._last = None
+        self._at = 0.0
+
+    @classmethod
+    def from_descriptor(cls, settings: dict):
+        """Deadband from the "deadband" entry of an entity descriptor"""
+        if not settings:
+            return None
+        return cls(
+            abs_tol=settings.get("abs", 0),
+            rel_tol=settings.get("rel", 0),
+            min_interval=settings.get("min_interval", 0),
+            heartbeat=settings.get("heartbeat", DEADBAND_HEARTBEAT),
+        )
+
+    def check(self, values: tuple, now: float = None) -> float:
+        """0 to write now, else seconds until held back values are due
+
+        math.inf when the values equal the last written ones.
+        """
+        now = time.monotonic() if now is None else now
+        last = self._last
+        if last is None or len(last) != len(values):
+            return 0
+        elapsed = now - self._at
+        significant = False
+        changed = False
+        for old, new in zip(last, values):
+            if old == new:
+                continue
+            changed = True
+            if not _numeric(old) or not _numeric(new) or (old == 0) != (new == 0):
+                return 0
+            if abs(new - old) > max(self.abs_tol, self.rel_tol * abs(old)):
+                significant = True
+        if not changed:
+            return math.inf
+        if elapsed >= self.heartbeat:
+            return 0
+        if significant:
+            return max(0, self.min_interval - elapsed)
+        return self.heartbeat - elapsed
+
+    def written(self, values: tuple, now: float = None) -> None:
+        self._last = values
+        self._at = time.monotonic() if now is None else now
+
+
+def _numeric(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -0,0 +1,34 @@
+""" Diagnostics support for Moonraker Controller """
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .common_raker import MoonrakerUpdateCoordinator
+from .const import DOMAIN
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict:
+    """Return diagnostics for a config entry."""
+    coordinator: MoonrakerUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    return {
+        "entry": async_redact_data(config_entry.data, TO_REDACT),
+        "metrics": coordinator.metrics.as_dict(),
+        "websocket": coordinator.moonraker.reconnect_stats,
+        "projection": coordinator.moonraker.projection,
+        "update_interval": str(coordinator.update_interval),
+        "restored": coordinator.restored,
+        "history": {
+            name: {"stats": history.stats(), "per_minute": history.downsample(60)}
+            for name, history in coordinator.printer.histories.items()
+        },
+        "klippy": {
+            "state": coordinator.printer.lifecycle.state,
+            "previous": coordinator.printer.lifecycle.previous,
+            "transitions": coordinator.printer.lifecycle.transitions,
+        },
+    }
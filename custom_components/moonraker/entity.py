@@ -0,0 +1,94 @@
+""" Moonraker base entity """
+import math
+import time
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .common_raker import MoonrakerUpdateCoordinator
+from .deadband import Deadband
+
+
+class MoonrakerEntity(CoordinatorEntity):
+    """Coordinator entity also notified when one of its printer fields changes
+
+    With a deadband, updates too small or too frequent to matter are held
+    back and flushed when due instead of writing a state every time.
+    """
+
+    def __init__(
+        self, coordinator: MoonrakerUpdateCoordinator, fields, deadband: dict = None
+    ) -> None:
+        super().__init__(coordinator)
+        printer = coordinator.printer
+        self._fields = {printer.field_source(comp, attr) for comp, attr in fields}
+        self._deadband = Deadband.from_descriptor(deadband)
+        self._unsub_flush = None
+        self._flush_due = 0.0
+
+    @property
+    def available(self) -> bool:
+        """Restored entities stay available until the grace period ends"""
+        return super().available or self.coordinator.restored_available
+
+    @property
+    def assumed_state(self) -> bool:
+        """True while showing the state cached before a restart"""
+        return self.coordinator.restored
+
+    def _deadband_values(self) -> tuple:
+        """State values the deadband compares, overridden by the platforms"""
+        printer = self.coordinator.printer
+        return tuple(
+            getattr(printer.component(comp), attr, None) for comp, attr in self._fields
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Register the entity in the coordinator field index"""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_field_listener(
+                self._fields, self._handle_coordinator_update
+            )
+        )
+        self.async_on_remove(self._cancel_flush)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state unless the deadband holds the change back"""
+        if self._deadband is None:
+            self.async_write_ha_state()
+            return
+        values = (self.available, self.assumed_state, *self._deadband_values())
+        printer = self.coordinator.printer
+        delay = self._deadband.check(values)
+        if delay and any(printer.is_pending(*field) for field in self._fields):
+            # Commands from the user show up right away
+            delay = 0
+        if delay == 0:
+            self._cancel_flush()
+            self._deadband.written(values)
+            self.async_write_ha_state()
+        elif delay == math.inf:
+            self._cancel_flush()
+        else:
+            printer.metrics.writes_held += 1
+            due = time.monotonic() + delay
+            if self._unsub_flush is None or due < self._flush_due:
+                self._cancel_flush()
+                self._flush_due = due
+                self._unsub_flush = async_call_later(
+                    self.hass, delay, self._async_flush
+                )
+
+    @callback
+    def _async_flush(self, _now) -> None:
+        self._unsub_flush = None
+        self._handle_coordinator_update()
+
+    @callback
+    def _cancel_flush(self) -> None:
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
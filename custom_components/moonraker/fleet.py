@@ -0,0 +1,66 @@
+""" Scheduling shared by every printer of the integration """
+import asyncio
+import time
+
+from .const import FLEET_CONCURRENCY, FLEET_TIMEOUT_MIN, HTTP_TIMEOUT
+
+
+class MoonrakerFleet:
+    """Per-domain fleet manager stored in hass.data[DOMAIN][DATA_FLEET]
+
+    Bounds how many printers are refreshed at once, spreads their poll
+    phases evenly over the interval and shortens the timeout of printers
+    that keep failing.
+    """
+
+    def __init__(
+        self,
+        limit: int = FLEET_CONCURRENCY,
+        timeout: float = HTTP_TIMEOUT,
+        timeout_min: float = FLEET_TIMEOUT_MIN,
+    ) -> None:
+        self._semaphore = asyncio.Semaphore(limit)
+        self._timeout = timeout
+        self._timeout_min = timeout_min
+        self._members = []
+        self._failures = {}
+
+    @property
+    def members(self) -> list:
+        return list(self._members)
+
+    def register(self, member: str) -> None:
+        if member not in self._members:
+            self._members.append(member)
+
+    def unregister(self, member: str) -> None:
+        if member in self._members:
+            self._members.remove(member)
+
+    def slot(self) -> asyncio.Semaphore:
+        """Async context manager bounding concurrent refreshes"""
+        return self._semaphore
+
+    def timeout(self, member: str) -> float:
+        """Refresh timeout, halved for every consecutive failure"""
+        failures = self._failures.get(member, 0)
+        return max(self._timeout_min, self._timeout / 2**failures)
+
+    def record(self, member: str, success: bool) -> None:
+        if success:
+            self._failures.pop(member, None)
+        else:
+            self._failures[member] = self._failures.get(member, 0) + 1
+
+    def phase(self, member: str, interval: float) -> float:
+        """Offset of this member within the interval"""
+        if member not in self._members:
+            return 0.0
+        return interval * self._members.index(member) / len(self._members)
+
+    def align(self, member: str, interval: float) -> float:
+        """Delay to the next poll slot of member, between 0.5 and 1.5 interval"""
+        delay = (self.phase(member, interval) - time.time()) % interval
+        if delay < interval / 2:
+            delay += interval
+        return delay
@@ -0,0 +1,158 @@
+""" Heater temperature history """
+from array import array
+import math
+import time
+
+from .const import HISTORY_INTERVAL, HISTORY_RATE_WINDOW, HISTORY_SIZE, HISTORY_WINDOW
+
+
+class TemperatureHistory:
+    """Fixed capacity ring buffer of temperature, target and power samples
+
+    Samples live in preallocated array('d') columns, one every
+    HISTORY_INTERVAL seconds at most, like Moonraker's own temperature
+    store, so memory stays bounded whatever the update rate.
+    """
+
+    __slots__ = (
+        "_size",
+        "_times",
+        "_temps",
+        "_targets",
+        "_powers",
+        "_next",
+        "_count",
+        "_writes",
+        "_stats",
+    )
+
+    def __init__(self, size: int = HISTORY_SIZE) -> None:
+        self._size = size
+        self._times = array("d", [math.nan]) * size
+        self._temps = array("d", [math.nan]) * size
+        self._targets = array("d", [math.nan]) * size
+        self._powers = array("d", [math.nan]) * size
+        self._next = 0
+        self._count = 0
+        self._writes = 0
+        self._stats = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, temperature, target=None, power=None, now: float = None) -> bool:
+        """Record a sample, False if the last one is more recent than the interval"""
+        if temperature is None:
+            return False
+        now = time.time() if now is None else now
+        if self._count and now - self._times[self._next - 1] < HISTORY_INTERVAL:
+            return False
+        index = self._next
+        self._times[index] = now
+        self._temps[index] = temperature
+        self._targets[index] = math.nan if target is None else target
+        self._powers[index] = math.nan if power is None else power
+        self._next = (index + 1) % self._size
+        self._count = min(self._count + 1, self._size)
+        self._writes += 1
+        return True
+
+    def backfill(self, store: dict, now: float = None) -> None:
+        """Replace the samples with a server.temperature_store entry
+
+        Moonraker keeps one sample per second, the last one taken now.
+        """
+        temperatures = store.get("temperatures") or []
+        targets = store.get("targets") or []
+        powers = store.get("powers") or []
+        now = time.time() if now is None else now
+        count = len(temperatures)
+        self._next = 0
+        self._count = 0
+        self._writes += 1
+        for index in range(max(0, count - self._size), count):
+            self.append(
+                temperatures[index],
+                targets[index] if index < len(targets) else None,
+                powers[index] if index < len(powers) else None,
+                now - (count - 1 - index),
+            )
+
+    def _indexes(self, since: float):
+        """Buffer indexes of the samples taken since, newest first"""
+        index = self._next
+        for _ in range(self._count):
+            index = (index - 1) % self._size
+            if self._times[index] < since:
+                return
+            yield index
+
+    def stats(self, window: float = HISTORY_WINDOW, now: float = None) -> dict:
+        """Min, mean, max, stability (standard deviation) over window seconds
+
+        heating_rate is the least squares slope of the last
+        HISTORY_RATE_WINDOW seconds in degrees per minute. Without now, the
+        result is cached until the next sample.
+        """
+        if now is None:
+            key = (self._writes, window)
+            if self._stats is None or self._stats[0] != key:
+                self._stats = (key, self._stats_at(window, time.time()))
+            return self._stats[1]
+        return self._stats_at(window, now)
+
+    def _stats_at(self, window: float, now: float) -> dict:
+        temps = [self._temps[index] for index in self._indexes(now - window)]
+        if not temps:
+            return {}
+        mean = sum(temps) / len(temps)
+        variance = sum((temp - mean) ** 2 for temp in temps) / len(temps)
+        return {
+            "temperature_min": round(min(temps), 2),
+            "temperature_mean": round(mean, 2),
+            "temperature_max": round(max(temps), 2),
+            "stability": round(math.sqrt(variance), 3),
+            "heating_rate": self._heating_rate(now),
+        }
+
+    def _heating_rate(self, now: float):
+        points = [
+            (self._times[index], self._temps[index])
+            for index in self._indexes(now - HISTORY_RATE_WINDOW)
+        ]
+        if len(points) < 2:
+            return None
+        mean_t = sum(point[0] for point in points) / len(points)
+        mean_v = sum(point[1] for point in points) / len(points)
+        spread = sum((point[0] - mean_t) ** 2 for point in points)
+        if spread == 0:
+            return None
+        slope = sum((t - mean_t) * (v - mean_v) for t, v in points) / spread
+        return round(slope * 60, 2)
+
+    def downsample(self, bucket: float, span: float = None, now: float = None) -> list:
+        """[start, min, mean, max, target] per bucket seconds, oldest first"""
+        now = time.time() if now is None else now
+        since = now - span if span is not None else -math.inf
+        buckets = {}
+        for index in self._indexes(since):
+            start = self._times[index] // bucket * bucket
+            temp = self._temps[index]
+            entry = buckets.get(start)
+            if entry is None:
+                buckets[start] = [temp, temp, temp, 1, self._targets[index]]
+            else:
+                entry[0] = min(entry[0], temp)
+                entry[1] = max(entry[1], temp)
+                entry[2] += temp
+                entry[3] += 1
+        return [
+            [
+                start,
+                round(low, 2),
+                round(total / count, 2),
+                round(high, 2),
+                None if math.isnan(target) else target,
+            ]
+            for start, (low, high, total, count, target) in sorted(buckets.items())
+        ]
@@ -0,0 +1,104 @@
+""" Websocket ingest queue """
+import asyncio
+import collections
+import logging
+
+from .const import INGEST_QUEUE_SIZE
+from .lifecycle import KLIPPY_NOTIFICATIONS
+from .metrics import PrinterMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+STATUS_UPDATE = "notify_status_update"
+PROC_STAT_UPDATE = "notify_proc_stat_update"
+
+
+class IngestQueue:
+    """Bounded FIFO of notifications between the socket reader and the parser
+
+    When full, a status delta is merged into the last queued one (latest
+    value per field wins) and a proc stat replaces the queued one, other
+    notifications are dropped. Merges never cross a lifecycle event, a
+    delta with nothing to merge into and lifecycle events are queued past
+    the bound rather than lost.
+    """
+
+    def __init__(
+        self, maxsize: int = INGEST_QUEUE_SIZE, metrics: PrinterMetrics = None
+    ) -> None:
+        self._maxsize = maxsize
+        self._metrics = metrics if metrics is not None else PrinterMetrics()
+        self._frames = collections.deque()
+        self._tail = {}
+        self._ready = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._busy = False
+        self._closed = False
+
+    @property
+    def depth(self) -> int:
+        return len(self._frames)
+
+    def put(self, data: dict) -> None:
+        """Queue a notification, merging or dropping it when full"""
+        method = data.get("method")
+        if len(self._frames) >= self._maxsize and method not in KLIPPY_NOTIFICATIONS:
+            if self._merge(method, data):
+                return
+            if method not in (STATUS_UPDATE, PROC_STAT_UPDATE):
+                self._metrics.ingest_dropped += 1
+                _LOGGER.debug("Ingest queue full, dropped %s", method)
+                return
+        self._frames.append(data)
+        if method in KLIPPY_NOTIFICATIONS:
+            # Deltas after a lifecycle event must stay after it
+            self._tail.clear()
+        elif method in (STATUS_UPDATE, PROC_STAT_UPDATE):
+            self._tail[method] = data
+        self._metrics.ingest_depth = len(self._frames)
+        self._idle.clear()
+        self._ready.set()
+
+    def _merge(self, method: str, data: dict) -> bool:
+        target = self._tail.get(method)
+        if target is None:
+            return False
+        if method == STATUS_UPDATE:
+            status = target["params"][0]
+            for obj, fields in data["params"][0].items():
+                status.setdefault(obj, {}).update(fields)
+            target["params"][1:] = data["params"][1:]
+        else:
+            target["params"] = data["params"]
+        self._metrics.ingest_merged += 1
+        return True
+
+    async def get(self) -> dict:
+        """Next notification, None once closed and empty"""
+        self._busy = False
+        while not self._frames:
+            if self._closed:
+                self._idle.set()
+                return None
+            self._idle.set()
+            self._ready.clear()
+            await self._ready.wait()
+        data = self._frames.popleft()
+        method = data.get("method")
+        if self._tail.get(method) is data:
+            # Being handled, too late to merge into it
+            del self._tail[method]
+        self._metrics.ingest_depth = len(self._frames)
+        self._busy = True
+        return data
+
+    async def join(self) -> None:
+        """Wait until every queued notification has been handled"""
+        if self._frames or self._busy:
+            await self._idle.wait()
+
+    def close(self) -> None:
+        """Let get() return None after the last frame"""
+        self._closed = True
+        self._ready.set()
@@ -0,0 +1,52 @@
+""" Klippy lifecycle """
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+READY = "ready"
+STARTUP = "startup"
+SHUTDOWN = "shutdown"
+ERROR = "error"
+DISCONNECTED = "disconnected"
+
+# Moonraker notifications and the Klippy state they move to
+KLIPPY_NOTIFICATIONS = {
+    "notify_klippy_ready": READY,
+    "notify_klippy_shutdown": SHUTDOWN,
+    "notify_klippy_disconnected": DISCONNECTED,
+}
+
+
+class KlippyLifecycle:
+    """Klippy state machine fed by server.info and Moonraker notifications
+
+    Printer objects can only be queried or subscribed while Klippy is
+    ready, callers act on transitions instead of asking on every cycle.
+    """
+
+    __slots__ = ("_name", "state", "previous", "transitions")
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self.state = None
+        self.previous = None
+        self.transitions = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def transition(self, state: str) -> bool:
+        """Move to state, True if it is a real transition"""
+        if state == self.state:
+            return False
+        self.previous = self.state
+        self.state = state
+        self.transitions += 1
+        _LOGGER.info("%s: klippy %s -> %s", self._name, self.previous, state)
+        return True
+
+    def reset(self) -> None:
+        """Forget the state, the next server.info tells it again"""
+        self.previous = self.state
+        self.state = None
@@ -0,0 +1,149 @@
+""" Per-printer performance metrics """
+import time
+
+from .const import METRICS_RATE_WINDOW
+
+# Upper bounds in milliseconds, the last bucket catches everything above
+HISTOGRAM_BOUNDS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class RateCounter:
+    """Events per second over the last `window` seconds, one bucket per second"""
+
+    __slots__ = ("_window", "_buckets", "_second", "total")
+
+    def __init__(self, window: int = METRICS_RATE_WINDOW) -> None:
+        self._window = window
+        self._buckets = [0] * window
+        self._second = int(time.monotonic())
+        self.total = 0
+
+    def _advance(self) -> None:
+        second = int(time.monotonic())
+        if second != self._second:
+            for step in range(1, min(second - self._second, self._window) + 1):
+                self._buckets[(self._second + step) % self._window] = 0
+            self._second = second
+
+    def add(self, count: int = 1) -> None:
+        self._advance()
+        self._buckets[self._second % self._window] += count
+        self.total += count
+
+    @property
+    def rate(self) -> float:
+        self._advance()
+        # The current second is still filling up, leave it out
+        current = self._buckets[self._second % self._window]
+        return (sum(self._buckets) - current) / (self._window - 1)
+
+
+class Histogram:
+    """Fixed bucket histogram of durations in milliseconds"""
+
+    __slots__ = ("counts", "count", "sum", "last")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.last = None
+
+    def observe(self, value: float) -> None:
+        index = 0
+        for bound in HISTOGRAM_BOUNDS:
+            if value <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.last = value
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else None
+
+    def as_dict(self) -> dict:
+        labels = [f"<={bound}" for bound in HISTOGRAM_BOUNDS] + ["inf"]
+        return {
+            "count": self.count,
+            "mean_ms": self.mean,
+            "last_ms": self.last,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class PrinterMetrics:
+    """Counters filled by MoonrakerClient, Printer and the coordinator"""
+
+    def __init__(self) -> None:
+        self.frames = RateCounter()
+        self.bytes_in = RateCounter()
+        self.bytes_out = RateCounter()
+        self.parse_time = Histogram()
+        self.command_rtt = Histogram()
+        self.fanout = RateCounter()
+        self.fanout_last = 0
+        self.reconnect_count = 0
+        self.queue_depth = 0
+        self.rtt = None
+        self.transport = None
+        self.ingest_depth = 0
+        self.ingest_merged = 0
+        self.ingest_dropped = 0
+        self.writes_held = 0
+
+    def frame_received(self, size: int) -> None:
+        self.frames.add()
+        self.bytes_in.add(size)
+
+    def sent(self, size: int) -> None:
+        self.bytes_out.add(size)
+
+    def parsed(self, seconds: float) -> None:
+        self.parse_time.observe(seconds * 1000)
+
+    def notified(self, entities: int) -> None:
+        self.fanout_last = entities
+        self.fanout.add(entities)
+
+    def command(self, seconds: float) -> None:
+        self.command_rtt.observe(seconds * 1000)
+
+    @property
+    def summary(self) -> dict:
+        """Flat values read by the diagnostic sensors"""
+        return {
+            "frames_per_second": round(self.frames.rate, 2),
+            "bytes_in_per_second": round(self.bytes_in.rate, 1),
+            "bytes_out_per_second": round(self.bytes_out.rate, 1),
+            "bytes_in": self.bytes_in.total,
+            "bytes_out": self.bytes_out.total,
+            "parse_time": _round(self.parse_time.mean, 3),
+            "fanout_per_second": round(self.fanout.rate, 2),
+            "fanout_last": self.fanout_last,
+            "command_rtt": _round(self.command_rtt.last, 1),
+            "rtt": _round(self.rtt, 1),
+            "transport": self.transport,
+            "reconnect_count": self.reconnect_count,
+            "queue_depth": self.queue_depth,
+            "ingest_depth": self.ingest_depth,
+            "ingest_merged": self.ingest_merged,
+            "ingest_dropped": self.ingest_dropped,
+            "writes_held": self.writes_held,
+        }
+
+    def as_dict(self) -> dict:
+        """Everything, histograms included, for the diagnostics download"""
+        return {
+            **self.summary,
+            "frames_total": self.frames.total,
+            "fanout_total": self.fanout.total,
+            "parse_time_histogram": self.parse_time.as_dict(),
+            "command_rtt_histogram": self.command_rtt.as_dict(),
+        }
+
+
+def _round(value, digits: int):
+    return None if value is None else round(value, digits)
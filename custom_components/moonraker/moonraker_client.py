@@ -1,13 +1,9 @@
 """ Moonraker Client """
-# import asyncio
-import requests
-
-# from requests import ConnectionError
-import functools
+import asyncio
 import logging
+import random
+import time
 import json
-import websockets
-from websockets.exceptions import ConnectionClosed  # pylint:disable=unused-import
 from yarl import URL
 
 from homeassistant.core import HomeAssistant  # , Callable
@@ -17,12 +13,23 @@ from homeassistant.util import slugify as util_slugify
 # from homeassistant.helpers import network
 # from .common_raker import MoonrakerUpdateCoordinator
 from .printer import Printer
-from .const import DOMAIN, VERSION  # pylint:disable=unused-import
+from .transport import MoonrakerHttpTransport
+from .rpc import MoonrakerRpcSession
+from .projection import build_projection, default_fields, projection_query
+from .codec import StaticRequest
+from .lifecycle import DISCONNECTED, KLIPPY_NOTIFICATIONS, READY
+from .const import (  # pylint:disable=unused-import
+    DOMAIN,
+    VERSION,
+    HTTP_CONNECTION_LIMIT,
+    HTTP_TIMEOUT,
+    GCODE_TIMEOUT,
+    WS_RECONNECT_MIN,
+    WS_RECONNECT_MAX,
+    WS_COALESCE_WINDOW,
+)
 
 _LOGGER = logging.getLogger(__name__)
-wslogger = logging.getLogger("websockets")
-wslogger.setLevel(logging.DEBUG)
-wslogger.addHandler(logging.StreamHandler())
 
 
 class MoonrakerClient:
@@ -42,6 +49,9 @@ class MoonrakerClient:
         extruders: str = None,
         heater_fan: str = None,
         filament_switch_sensor: str = None,
+        http_limit: int = HTTP_CONNECTION_LIMIT,
+        http_timeout: float = HTTP_TIMEOUT,
+        coalesce_window: float = WS_COALESCE_WINDOW,
     ) -> None:
         self._connection_id = None
         self._host = host
@@ -59,6 +69,9 @@ class MoonrakerClient:
         self._id_number = 0
         self._has_sub = False
         self._last_status_code = None
+        self._http = MoonrakerHttpTransport(
+            limit=http_limit, timeout=http_timeout, metrics=self._printer.metrics
+        )
         self._ws_url = URL.build(
             scheme="ws", host=self._host, port=self._port, path="/websocket"
         )
@@ -85,6 +98,24 @@ class MoonrakerClient:
             | set(self._filament_switch_sensor)
         )
         self._callbacks = set()
+        self._fields = default_fields(self._extruders)
+        self._projection = None
+        self._static_requests = {}
+        self._coordinator = None
+        self._supervisor = None
+        self._connect_count = 0
+        self._reconnect_count = 0
+        self._failed_attempts = 0
+        self._coalesce_window = coalesce_window
+        self._pending_status = {}
+        self._flush_handle = None
+        self._flush_task = None
+        self._rpc = MoonrakerRpcSession(
+            str(self._ws_url),
+            lambda: self.id_number,
+            self._ws_dispatch,
+            metrics=self._printer.metrics,
+        )
 
     @property
     def name(self) -> str:
@@ -98,6 +129,33 @@ class MoonrakerClient:
     def printer(self) -> Printer:
         return self._printer
 
+    @property
+    def reconnect_stats(self) -> dict:
+        """Websocket supervisor counters"""
+        return {
+            "connected": self._rpc.connected,
+            "connect_count": self._connect_count,
+            "reconnect_count": self._reconnect_count,
+            "failed_attempts": self._failed_attempts,
+        }
+
+    @property
+    def websocket_connected(self) -> bool:
+        """True while updates are pushed over the websocket"""
+        return self._has_sub and self._rpc.connected
+
+    async def probe(self) -> float:
+        """Round trip in seconds of a server.info ping over the active channel"""
+        start = time.monotonic()
+        await self.server_info()
+        rtt = time.monotonic() - start
+        self._printer.metrics.rtt = rtt * 1000
+        return rtt
+
+    async def reset_websocket(self) -> None:
+        """Drop the websocket, the supervisor opens a fresh one"""
+        await self._rpc.close()
+
     @property
     def id_number(self):
         """id number to use for Websocket queries"""
@@ -112,93 +170,354 @@ class MoonrakerClient:
     #         if self._connection_id is not None or self._last_status_code == 200
     #         else False
     #     )
+    @property
+    def projection(self) -> dict:
+        """{object: [fields]} requested from Moonraker"""
+        if self._projection is None:
+            self._projection = build_projection(
+                self._printer, self._attr_objects, self._fields
+            )
+            self._static_requests.clear()
+        return self._projection
+
+    def set_fields(self, fields) -> bool:
+        """Project queries on the fields entities read, True if it changed"""
+        fields = set(fields)
+        if fields == self._fields:
+            return False
+        self._fields = fields
+        projection = build_projection(self._printer, self._attr_objects, fields)
+        changed = projection != self._projection
+        self._projection = projection
+        if changed:
+            self._static_requests.clear()
+        return changed
+
+    def _static_request(self, method: str) -> StaticRequest:
+        """Pre-encoded identify/subscribe/query request, cached per projection"""
+        request = self._static_requests.get(method)
+        if request is None:
+            if method == "server.connection.identify":
+                params = self.ws_json_connect
+            else:
+                params = self.ws_json_subscribe
+            request = self._static_requests[method] = StaticRequest(method, params)
+        return request
+
+    async def resubscribe(self) -> None:
+        """Replace the websocket subscription with the current projection"""
+        if self._has_sub and self._rpc.connected:
+            res = await self._rpc.call_static(
+                self._static_request("printer.objects.subscribe")
+            )
+            await self._rpc.drain()
+            await self._ws_dispatch(res)
+
     def is_objects(self, obj: str) -> bool:
         """Test for objects set for the printer"""
         return obj in self._attr_objects
 
     async def fetch_data(self):
-        # try :
-        if self._printer.klippy.klippy_connected is not True:
+        lifecycle = self._printer.lifecycle
+        if not lifecycle.ready:
             await self.server_info()
-        return await self.query_objects()
+            if not lifecycle.ready:
+                # Objects cannot be queried until Klippy is ready again
+                return True
+            await self.objects_list()
+            await self.temperature_store()
+        try:
+            result = await self.query_objects()
+        except Exception:
+            # Klippy may have gone down, ask server.info on the next cycle
+            lifecycle.reset()
+            raise
+        # Klippy in shutdown or error still answers queries, its state is in
+        # webhooks. Leaving ready pauses the queries until server.info says
+        # it is back, and slows polling down to the idle interval.
+        state = self._printer.webhooks.state
+        if state is not None and state != READY and lifecycle.transition(state):
+            await self._printer.update_component("klippy", {"klippy_state": state})
+        return result
 
     async def server_info(self) -> bool:
         """Get server information (also used as test connection)"""
-        url = URL.build(
-            scheme=self._protocol,
-            host=self._host,
-            port=self._port,
-            path="/server/info",
-        )
-        res = await self._http_get(url)
+        if self._rpc.connected:
+            res = await self._rpc.call("server.info")
+        else:
+            url = URL.build(
+                scheme=self._protocol,
+                host=self._host,
+                port=self._port,
+                path="/server/info",
+            )
+            res = await self._http_get(url)
         if res is not None and "result" in res:
-            await self._printer.klippy.update(res["result"])
+            await self._printer.update_component("klippy", res["result"])
+            self._klippy_transition(self._printer.klippy.klippy_state)
         return True  # TODO HANDLE Connnection failure
 
+    async def temperature_store(self) -> None:
+        """Backfill the heater histories from Moonraker's temperature store"""
+        try:
+            if self._rpc.connected:
+                res = await self._rpc.call("server.temperature_store")
+            else:
+                url = URL.build(
+                    scheme=self._protocol,
+                    host=self._host,
+                    port=self._port,
+                    path="/server/temperature_store",
+                )
+                res = await self._http_get(url)
+        except Exception as err:  # pylint: disable=broad-except
+            # Histories then fill from live updates only
+            _LOGGER.debug("temperature_store unavailable: %s", err)
+            return
+        if res is not None and "result" in res:
+            self._printer.backfill_history(res["result"])
+
+    async def objects_list(self) -> None:
+        """Register the components of every object loaded by Klipper"""
+        if self._rpc.connected:
+            res = await self._rpc.call("printer.objects.list")
+        else:
+            url = URL.build(
+                scheme=self._protocol,
+                host=self._host,
+                port=self._port,
+                path="/printer/objects/list",
+            )
+            res = await self._http_get(url)
+        if res is not None and "result" in res:
+            self._printer.register_objects(res["result"].get("objects", []))
+
     async def query_objects(self):
-        """Get Data from HTTP(s) Protocol"""
-        url = URL.build(
-            scheme=self._protocol,
-            host=self._host,
-            port=self._port,
-            path="/printer/objects/query",
-            query_string="&".join(self._attr_objects),
-        )
-        res = await self._http_get(url)
+        """Get Data from HTTP(s) Protocol, or the websocket once it is open"""
+        if self._rpc.connected:
+            res = await self._rpc.call_static(
+                self._static_request("printer.objects.query")
+            )
+        else:
+            url = URL.build(
+                scheme=self._protocol,
+                host=self._host,
+                port=self._port,
+                path="/printer/objects/query",
+                query_string=projection_query(self.projection),
+            )
+            res = await self._http_get(url)
         await self._printer.parse(res)
         return True  # TODO HANDLE Connnection failure
 
     async def websockets_test(self) -> bool:
         """Get Connection ID using Websocket protocol"""
         try:
-            async with websockets.connect(  # pylint:disable=no-member
-                str(self._ws_url), ping_interval=None
-            ) as websocket:
-                await websocket.send(self.ws_json_connect)
-                res = await websocket.recv()
-                _LOGGER.debug("websockets_co response code: %s", res)
-                resj = json.loads(res)
-                self._connection_id = resj["result"]["connection_id"]
-                _LOGGER.debug("subscribe _connection_id: %s", self._connection_id)
+            await self._ws_identify()
         except Exception as err:
             _LOGGER.error("REQUEST FAILED websockets_co : %s", err)
             raise err
         return True if self._connection_id is not None else False
 
-    async def websockets_loop(self, coordinator):
-        """Subscribe to updatefrom websockets Protocol"""
+    def start_websocket(self, coordinator) -> None:
+        """Start the supervisor keeping the websocket alive"""
+        if self._supervisor is None or self._supervisor.done():
+            # Runs for the life of the entry, untracked by hass so that
+            # async_block_till_done does not wait on it; close() stops it
+            self._supervisor = asyncio.create_task(
+                self.websockets_supervisor(coordinator)
+            )
+
+    async def websockets_supervisor(self, coordinator):
+        """Run websockets_loop forever, reconnecting with jittered backoff"""
+        attempt = 0
+        while True:
+            subscribed = await self.websockets_loop(coordinator)
+            if subscribed:
+                attempt = 0
+            else:
+                self._failed_attempts += 1
+                attempt += 1
+            delay = min(WS_RECONNECT_MAX, WS_RECONNECT_MIN * 2**attempt)
+            delay *= random.uniform(0.5, 1.0)
+            _LOGGER.warning(
+                "Websocket to %s lost, reconnecting in %.1fs", self._name, delay
+            )
+            await asyncio.sleep(delay)
+
+    async def websockets_loop(self, coordinator) -> bool:
+        """Subscribe to updatefrom websockets Protocol
+
+        Returns once the connection drops, True if it got subscribed.
+        """
+        self._coordinator = coordinator
+        subscribed = False
         try:
-            async with websockets.connect(  # pylint:disable=no-member
-                str(self._ws_url), ping_interval=None
-            ) as websocket:
-                if self._connection_id is None:
-                    await websocket.send(self.ws_json_connect)
-                    res = await websocket.recv()
-                    resj = json.loads(res)
-                    if "result" in resj:
-                        self._connection_id = resj["result"]["connection_id"]
-                    else:
-                        _LOGGER.warning(
-                            "Websockets _connection_id not found in : %s", resj
-                        )
-                    if self._has_sub is False:
-                        await websocket.send(self.ws_json_subscribe)
-                while coordinator.listeners:
-                    res = await websocket.recv()
-                    isok = await self._printer.wsparse(json.loads(res))
-                    if isok is True:
-                        coordinator.async_set_updated_data(isok)
-                    _LOGGER.debug("websockets response code: %s", res)
-        except ConnectionClosed as err:
+            await self._ws_identify()
+            if self._has_sub is False:
+                self._count_connect()
+                await self._ws_subscribe()
+            # A subscription refused while Klippy is down is retried on
+            # notify_klippy_ready, there is nothing to poll meanwhile.
+            coordinator.async_set_push(
+                self._has_sub or not self._printer.lifecycle.ready
+            )
+            # Off the bootstrap path: the klippy state is not part of the
+            # subscription, server.info fills it once updates are flowing.
+            await self.server_info()
+            await self.temperature_store()
+            await self._rpc.wait_closed()
+        except Exception as err:  # pylint: disable=broad-except
             _LOGGER.error("REQUEST websockets : %s", err)
-            self._connection_id = None
-            self._has_sub = False
+            await self._rpc.close()
+        subscribed = self._has_sub
+        self._connection_id = None
+        self._has_sub = False
+        coordinator.async_set_push(False)
+        return subscribed
+
+    async def websocket_bootstrap(self, coordinator) -> bool:
+        """Identify and subscribe, the subscribe result is the first snapshot
+
+        Two round trips on the connection the supervisor then keeps.
+        """
+        self._coordinator = coordinator
+        await self._ws_identify()
+        self._count_connect()
+        return await self._ws_subscribe()
+
+    def _count_connect(self) -> None:
+        if self._connect_count > 0:
+            self._reconnect_count += 1
+            self._printer.metrics.reconnect_count = self._reconnect_count
+        self._connect_count += 1
+
+    async def _ws_subscribe(self) -> bool:
+        """Subscribe to the projection and apply the snapshot it returns"""
+        # Components are created from the snapshot itself, no objects list
+        res = await self._rpc.call_static(
+            self._static_request("printer.objects.subscribe")
+        )
+        self._has_sub = "result" in res
+        await self._rpc.drain()
+        await self._ws_dispatch(res)
+        if self._has_sub:
+            # The snapshot carries webhooks.state, Klippy in shutdown or
+            # error accepts subscriptions too
+            self._printer.lifecycle.transition(self._printer.webhooks.state or READY)
+        return self._has_sub
+
+    def _klippy_transition(self, state: str) -> None:
+        """Follow a Klippy state change, subscribe again once it is ready"""
+        if self._printer.lifecycle.transition(state) and state == READY:
+            if self._rpc.connected:
+                # Klippy restarts drop the subscription, and this may run
+                # in the websocket reader which must not wait on a call
+                self._hass.async_create_task(self._ws_klippy_ready())
+
+    async def _ws_klippy_ready(self) -> None:
+        try:
+            await self._ws_subscribe()
+            if self._coordinator is not None:
+                self._coordinator.async_set_push(self._has_sub)
+            await self.server_info()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.error("Subscribe after klippy ready failed: %s", err)
 
-    #           continue
-    # return True if res.status_code==200 else False
+    async def _ws_identify(self) -> None:
+        """Open the shared websocket and identify this client"""
+        await self._rpc.connect()
+        if self._connection_id is None:
+            resj = await self._rpc.call_static(
+                self._static_request("server.connection.identify")
+            )
+            if "result" in resj:
+                self._connection_id = resj["result"]["connection_id"]
+                _LOGGER.debug("subscribe _connection_id: %s", self._connection_id)
+            else:
+                _LOGGER.warning("Websockets _connection_id not found in : %s", resj)
+
+    async def _ws_dispatch(self, data: dict) -> None:
+        """Route a notification (or subscribe result) to the printer
+
+        notify_status_update deltas are merged for coalesce_window seconds
+        and applied once per tick, anything else flushes them first.
+        """
+        method = data.get("method")
+        klippy_state = KLIPPY_NOTIFICATIONS.get(method)
+        if klippy_state is not None:
+            await self.flush_status()
+            await self._printer.update_component(
+                "klippy",
+                {
+                    "klippy_state": klippy_state,
+                    "klippy_connected": klippy_state != DISCONNECTED,
+                },
+            )
+            self._notify_changes()
+            self._klippy_transition(klippy_state)
+            return
+        if self._coalesce_window > 0 and method == "notify_status_update":
+            for params in data.get("params", []):
+                if isinstance(params, dict):
+                    for obj, fields in params.items():
+                        self._pending_status.setdefault(obj, {}).update(fields)
+            if self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(
+                    self._coalesce_window, self._flush_due
+                )
+            return
+        await self.flush_status()
+        isok = await self._printer.wsparse(data)
+        if isok is True:
+            self._notify_changes()
+
+    def _flush_due(self) -> None:
+        self._flush_handle = None
+        if self._pending_status:
+            self._flush_task = self._hass.async_create_task(self.flush_status())
+            self._flush_task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        if self._flush_task is task:
+            self._flush_task = None
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.error("Status flush failed: %s", task.exception())
+
+    async def flush_status(self) -> None:
+        """Apply the pending status deltas right away"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending_status:
+            return
+        pending = self._pending_status
+        self._pending_status = {}
+        await self._printer.wsupdate({"params": [pending]})
+        self._notify_changes()
+
+    def _notify_changes(self) -> None:
+        if self._coordinator is not None:
+            self._coordinator.async_update_fields(self._printer.pop_changes())
 
     async def push_data(self, gcode):
         """Send GCODE to moonraker server"""
+        start = time.monotonic()
+        if self._rpc.connected:
+            try:
+                res = await self._rpc.call(
+                    "printer.gcode.script", {"script": gcode}, timeout=GCODE_TIMEOUT
+                )
+                self._printer.metrics.command(time.monotonic() - start)
+            except Exception as err:
+                _LOGGER.error("REQUEST FAILED push_data : %s", err)
+                raise err
+            _LOGGER.debug("push_data response: %s", res)
+            # Show the effect of the command without waiting for the tick,
+            # its status notifications may still be in the ingest queue
+            await self._rpc.drain()
+            await self.flush_status()
+            return "result" in res
         url = URL.build(
             scheme=self._protocol,
             host=self._host,
@@ -206,60 +525,47 @@ class MoonrakerClient:
             path="/printer/gcode/script",
             # query_string=gcode
         )
-        headers = {}
         data = {"script": gcode}
         try:
-            func = functools.partial(
-                requests.post, str(url), headers=headers, data=data
-            )
-            res = await self._hass.async_add_executor_job(func)
-            _LOGGER.debug("push_data status_code: %s", res.status_code)
+            status_code = await self._http.post(url, data=data, timeout=GCODE_TIMEOUT)
+            self._printer.metrics.command(time.monotonic() - start)
+            _LOGGER.debug("push_data status_code: %s", status_code)
         except Exception as err:
             _LOGGER.error("REQUEST FAILED push_data : %s", err)
             raise err
-        self._last_status_code = res.status_code
-        return True if res.status_code == 200 else False
+        self._last_status_code = status_code
+        return True if status_code == 200 else False
+
+    async def close(self) -> None:
+        """Close the websocket and release the pooled HTTP connections"""
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            await asyncio.gather(self._supervisor, return_exceptions=True)
+            self._supervisor = None
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self._rpc.close()
+        await self._http.close()
 
     @property
-    def ws_json_connect(self) -> str:
-        """Websocket JSON to get a connect id from Moonraker"""
-        return json.dumps(
-            {
-                "jsonrpc": "2.0",
-                "method": "server.connection.identify",
-                "params": {
-                    "client_name": "home_assistant",
-                    "version": VERSION,
-                    "type": "bot",
-                    "url": self._instance_url,
-                },
-                "id": self.id_number,
-            }
-        )
+    def ws_json_connect(self) -> dict:
+        """Websocket params to get a connect id from Moonraker"""
+        return {
+            "client_name": "home_assistant",
+            "version": VERSION,
+            "type": "bot",
+            "url": self._instance_url,
+        }
 
     @property
-    def ws_json_subscribe(self) -> str:
-        """Websocket JSON to subscribe for update from Moonraker"""
-        objects = {}
-        for param in self._attr_objects:
-            objects[param] = None
-        return json.dumps(
-            {
-                "jsonrpc": "2.0",
-                "method": "printer.objects.subscribe",
-                "params": {"objects": objects},
-                "id": self.id_number,
-            }
-        )
+    def ws_json_subscribe(self) -> dict:
+        """Websocket params to subscribe for update from Moonraker"""
+        return {"objects": self.projection}
 
-    async def _http_get(self, url, headers={}, refjson={}) -> json:
+    async def _http_get(self, url, headers=None) -> json:
         """Get server information using http get"""
-        func = functools.partial(requests.get, str(url), headers=headers, json=refjson)
-        result = await self._hass.async_add_executor_job(func)
-        if result.status_code != 200:
-            raise ConnectionError(
-                "REQUEST FAILED for {url} with status code {code}".format(
-                    url=str(url), code=result.status_code
-                )
-            )
-        return result.json()
+        return await self._http.get(url, headers=headers)
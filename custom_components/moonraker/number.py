@@ -1,95 +1,21 @@
 """Moonraker  Number Entity for Home Assistant"""
 import logging
 import copy
-from homeassistant.const import (
-    PERCENTAGE,
-)
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant  # , callback
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.components.number import NumberEntity
 from .common_raker import MoonrakerUpdateCoordinator
-from .const import DOMAIN, CONF_PRINTER_EXTRUDERS
-from homeassistant.util import slugify as util_slugify
-
-NUMBER_EXTRUDERS_MODELS = {
-    "component": "extruder",
-    "attribut": "pressure_advance",
-    "name": "Pressure advance",
-    "attr_icon": "mdi:printer-3d-nozzle",
-    "unit_of_measurement": "s",
-    "native_max_value": 1,
-    "native_min_value": 0,
-    "native_step": 0.001,
-    "gcode": "SET_PRESSURE_ADVANCE EXTRUDER=extruder ADVANCE={:.3f}",
-    "mode": "box",
-}
-
-NUMBERS_LIST = (
-    {
-        "component": "toolhead",
-        "attribut": "max_accel",
-        "name": "Maximun accel",
-        "attr_icon": "mdi:printer-3d",
-        "unit_of_measurement": "mm/s²",
-        "native_max_value": 10000,
-        "native_min_value": 0,
-        "native_step": 100,
-        "gcode": "SET_VELOCITY_LIMIT ACCEL={:.0f}",
-        "mode": "box",
-    },
-    {
-        "component": "toolhead",
-        "attribut": "max_velocity",
-        "name": "Maximun velocity",
-        "attr_icon": "mdi:printer-3d",
-        "unit_of_measurement": "mm/s",
-        "native_max_value": 10000,
-        "native_min_value": 0,
-        "native_step": 5,
-        "gcode": "SET_VELOCITY_LIMIT VELOCITY={:.0f}",
-        "mode": "box",
-    },
-    {
-        "component": "toolhead",
-        "attribut": "max_accel_to_decel",
-        "name": "maximun accel to decel",
-        "attr_icon": "mdi:printer-3d",
-        "unit_of_measurement": "mm/s²",
-        "native_max_value": 10000,
-        "native_min_value": 0,
-        "native_step": 100,
-        "gcode": "SET_VELOCITY_LIMIT ACCEL_TO_DECEL={:.0f}",
-        "mode": "box",
-    },
-    {
-        "component": "toolhead",
-        "attribut": "square_corner_velocity",
-        "name": "square corner velocity",
-        "attr_icon": "mdi:printer-3d-nozzle",
-        "unit_of_measurement": "mm/s",
-        "native_max_value": 100,
-        "native_min_value": 0,
-        "native_step": 0.1,
-        "gcode": "SET_VELOCITY_LIMIT SQUARE_CORNER_VELOCITY={:.1f}",
-        "mode": "box",
-    },
-    {
-        "component": "fan",
-        "attribut": "speed",
-        "name": "Part fan speed",
-        "attr_icon": "mdi:fan",
-        "unit_of_measurement": PERCENTAGE,
-        "native_max_value": 100,
-        "native_min_value": 0,
-        "native_step": 1,
-        "gcode": "M106 S{:.0f}",  # TODO Convert PCT to 0..255 Range
-        "mode": "box",
-    },
+from .entity import MoonrakerEntity
+from .const import (
+    DOMAIN,
+    CONF_PRINTER_EXTRUDERS,
+    NUMBERS_LIST,
+    NUMBER_EXTRUDERS_MODELS,
 )
+from homeassistant.util import slugify as util_slugify
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -115,7 +41,7 @@ async def async_setup_entry(
     async_add_entities(entities)
 
 
-class MoonrakerNumberBase(CoordinatorEntity, NumberEntity):
+class MoonrakerNumberBase(MoonrakerEntity, NumberEntity):
     """Moonraker Number Enitity for Home Assistant"""
 
     should_poll = False
@@ -125,7 +51,9 @@ class MoonrakerNumberBase(CoordinatorEntity, NumberEntity):
     ) -> None:
 
         """Initialize the number."""
-        super().__init__(coordinator)
+        super().__init__(
+            coordinator, [(properties.get("component"), properties["attribut"])]
+        )
         self._attribut = properties["attribut"]
         if "component" in properties:
             self._component = properties["component"]
@@ -158,7 +86,11 @@ class MoonrakerNumberBase(CoordinatorEntity, NumberEntity):
     async def async_set_native_value(self, value: float) -> None:
         """Update the current value."""
         try:
-            await self.coordinator.moonraker.push_data(self._gcode.format(value))
+            await self.coordinator.async_send_gcode(
+                self._gcode.format(value),
+                key=(self._component, self._gcode),
+                optimistic=(self._component, self._attribut, value),
+            )
         except Exception as err:
             _LOGGER.error(
                 "FAILED async_set_native_value function for number : %s",
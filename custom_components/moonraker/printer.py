@@ -1,11 +1,21 @@
 """ Printer class and attributs parsing """
 import logging
 import json
-from .const import DOMAIN
+import time
+from .const import DOMAIN, OPTIMISTIC_TIMEOUT
+from .trace import FrameTracer
+from .metrics import PrinterMetrics
+from .lifecycle import KlippyLifecycle
+from .history import TemperatureHistory
 from homeassistant.helpers.entity import DeviceInfo
 
 _LOGGER = logging.getLogger(__name__)
 
+# Printer level properties and the component attribute they read from
+PRINTER_FIELDS = {"state": ("print_stats", "state")}
+
+_trace_frame = FrameTracer(_LOGGER)
+
 
 class Printer:
     """Printer class for Home Assistant"""
@@ -18,23 +28,105 @@ class Printer:
         self.heater_bed = Heater(printerid)
         self.klippy = Klipper(printerid)
         self.fan = Fan(printerid)
-        self.webhooks = MoonrakerStats(printerid)
+        self.webhooks = Webhooks(printerid)
         self._info = None
-        self.print_stats = MoonrakerStats(printerid)
+        self.print_stats = PrintStats(printerid)
         self.mrstats = MoonrakerStats(printerid)
+        self._components = {
+            "display_status": self.display_status,
+            "toolhead": self.toolhead,
+            "extruder": self.extruder,
+            "heater_bed": self.heater_bed,
+            "klippy": self.klippy,
+            "fan": self.fan,
+            "webhooks": self.webhooks,
+            "print_stats": self.print_stats,
+            "mrstats": self.mrstats,
+        }
+        self._changes = set()
+        self._optimistic = {}
+        self._history = {
+            "extruder": TemperatureHistory(),
+            "heater_bed": TemperatureHistory(),
+        }
+        self.metrics = PrinterMetrics()
+        self.lifecycle = KlippyLifecycle(printerid)
         _LOGGER.debug("Moonraker::Printer created : %s", self._id)
 
+    def __getattr__(self, name: str):
+        """Expose registry components (extruder1, ...) as attributes"""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        component = self.component(name)
+        if component is None:
+            raise AttributeError(name)
+        return component
+
     @property
     def id(self) -> str:
         return self._id
 
+    @property
+    def components(self) -> dict:
+        """Known printer components by Klipper object name"""
+        return {
+            name: comp for name, comp in self._components.items() if comp is not None
+        }
+
+    def component(self, name: str):
+        """Component for a Klipper object, created on first use
+
+        Unsupported object types are remembered as None so the lookup stays
+        a single dict access per frame.
+        """
+        try:
+            return self._components[name]
+        except KeyError:
+            pass
+        comp_type = COMPONENT_TYPES.get(object_type(name))
+        component = comp_type(self._id) if comp_type is not None else None
+        self._components[name] = component
+        if isinstance(component, Heater):
+            self._history[name] = TemperatureHistory()
+        return component
+
+    def history(self, name: str) -> TemperatureHistory:
+        """Temperature history of a heater, None for other components"""
+        if name not in self._history:
+            self.component(name)
+        return self._history.get(name)
+
+    @property
+    def histories(self) -> dict:
+        return self._history
+
+    def backfill_history(self, store: dict) -> None:
+        """Load a server.temperature_store result into the heater histories"""
+        for name, entry in store.items():
+            history = self.history(name)
+            if history is not None and isinstance(entry, dict):
+                history.backfill(entry)
+
+    def register_objects(self, objects: list) -> None:
+        """Create the components listed by printer.objects.list"""
+        for name in objects:
+            self.component(name)
+
     @property
     def state(self) -> str:
-        if hasattr(self.print_stats, "state"):
+        if self.print_stats.state is not None:
             return self.print_stats.state
         else:
             return "404"
 
+    @property
+    def is_heating(self) -> bool:
+        """True when any heater has a target set"""
+        return any(
+            isinstance(comp, Heater) and comp.target
+            for comp in self._components.values()
+        )
+
     @property
     def device_info(self) -> DeviceInfo:
         """Device info."""
@@ -46,18 +138,121 @@ class Printer:
             sw_version=self.klippy.moonraker_version,
         )
 
-    async def __update(self, component: str, data):
-        if hasattr(self, component):
-            await getattr(self, component).update(data)
+    def field_source(self, component: str, attr: str) -> tuple:
+        """(component, attribute) pair a possibly derived attribute reads from"""
+        if component is None:
+            return PRINTER_FIELDS.get(attr, (None, attr))
+        sources = getattr(getattr(self, component, None), "FIELD_SOURCES", {})
+        return (component, sources.get(attr, attr))
+
+    def pop_changes(self) -> set:
+        """Return and reset the (component, attribute) pairs changed so far"""
+        changes = self._changes
+        self._changes = set()
+        return changes
+
+    async def update_component(self, component: str, data):
+        """Update one component and record which attributes changed"""
+        comp = self.component(component)
+        if comp is not None:
+            changed = await comp.update(data)
+            for attr in changed:
+                self._changes.add((component, attr))
+            history = self._history.get(component)
+            if history is not None:
+                history.append(comp.temperature, comp.target, comp.power)
+            if self._optimistic and data:
+                for attr in data:
+                    self._reconcile_optimistic(comp, component, attr)
+
+    def _reconcile_optimistic(self, comp, component: str, attr: str) -> None:
+        """Confirm an optimistic value, or keep it until it expires
+
+        A report sent before the command took effect carries the old value,
+        it only becomes the value to roll back to.
+        """
+        key = (component, attr)
+        pending = self._optimistic.get(key)
+        if pending is None:
+            return
+        reported = getattr(comp, attr, None)
+        if reported == pending[0]:
+            del self._optimistic[key]
+            return
+        self._optimistic[key] = (pending[0], reported, pending[2])
+        setattr(comp, attr, pending[0])
+        self._changes.discard(key)
+
+    def snapshot(self) -> dict:
+        """Known field values per component, to restore after a restart"""
+        snapshot = {}
+        for name, comp in self._components.items():
+            if comp is None:
+                continue
+            values = {}
+            for attr, slot in comp._SLOTS.items():
+                value = slot.__get__(comp)
+                if value is not None:
+                    values[attr] = value
+            if values:
+                snapshot[name] = values
+        # Optimistic values were never confirmed, keep the reported ones
+        for (component, attr), pending in self._optimistic.items():
+            if component in snapshot:
+                snapshot[component][attr] = pending[1]
+        return snapshot
+
+    async def restore(self, snapshot: dict) -> None:
+        """Load a snapshot taken before a restart, without recording changes"""
+        for name, values in snapshot.items():
+            comp = self.component(name)
+            if comp is not None:
+                await comp.update(values)
+
+    def set_optimistic(
+        self, component: str, attr: str, value, timeout: float = OPTIMISTIC_TIMEOUT
+    ) -> None:
+        """Show value right away until the printer reports it or timeout ends"""
+        comp = self.component(component)
+        if comp is None:
+            return
+        key = (component, attr)
+        previous = self._optimistic.get(key, (None, getattr(comp, attr)))[1]
+        self._optimistic[key] = (value, previous, time.monotonic() + timeout)
+        if getattr(comp, attr) != value:
+            setattr(comp, attr, value)
+            self._changes.add(key)
+
+    def rollback_optimistic(self, component: str, attr: str) -> None:
+        """Restore the last reported value of a pending optimistic field"""
+        pending = self._optimistic.pop((component, attr), None)
+        if pending is not None:
+            comp = self.component(component)
+            if getattr(comp, attr) != pending[1]:
+                setattr(comp, attr, pending[1])
+                self._changes.add((component, attr))
+
+    def expire_optimistic(self) -> None:
+        """Roll back the optimistic fields past their deadline"""
+        now = time.monotonic()
+        for component, attr in [
+            key for key, pending in self._optimistic.items() if pending[2] <= now
+        ]:
+            self.rollback_optimistic(component, attr)
+
+    def is_pending(self, component: str, attr: str) -> bool:
+        """True while an optimistic value waits for confirmation"""
+        return (component, attr) in self._optimistic
 
     async def parse(self, data: json):
         """Reading result from query"""
+        start = time.perf_counter()
         try:
             if data is not None and "result" in data:
                 if "status" in data["result"]:
                     result = data["result"]["status"]
                     for key in result:
-                        await self.__update(key, result[key])
+                        await self.update_component(key, result[key])
                 else:
                     _LOGGER.error("Printer.parse : JSON missing status key")
             else:
@@ -65,12 +260,13 @@ class Printer:
         except Exception as err:
             _LOGGER.error("REQUEST FAILED: %s", err)
             raise err
+        self.metrics.parsed(time.perf_counter() - start)
         # _LOGGER.error("FAILED :D")
         return None
 
     async def wsparse(self, data: json) -> bool:
         """Reading result from websocket query"""
-        _LOGGER.debug("Dataset : %s", json.dumps(data))
+        _trace_frame("Dataset", data)
         if data is None:
             _LOGGER.warning("Unsuported dataset")
             return False
@@ -80,60 +276,96 @@ class Printer:
             # match data["method"]:
             #    case "notify_proc_stat_update":
             if data["method"] == "notify_proc_stat_update":
-                _LOGGER.info("NFO notify_proc_stat_update")
+                start = time.perf_counter()
                 for params in data["params"]:
-                    self.mrstats.update(params)
+                    await self.update_component("mrstats", params)
+                self.metrics.parsed(time.perf_counter() - start)
             elif data["method"] == "notify_status_update":
-                _LOGGER.info("NFO notify_status_update")
                 await self.wsupdate(data)
             else:
-                _LOGGER.warning("Unsuported method %s", data["method"])
+                # gcode responses, file and history events... not tracked
+                _LOGGER.debug("Unsuported method %s", data["method"])
                 return False
         return True
 
     async def wsupdate(self, data):
         """Update specific value"""
+        start = time.perf_counter()
         try:
             if data is not None and "params" in data:
                 for params in data["params"]:
-                    _LOGGER.debug("params %s : %s", type(params), str(params))
                     if isinstance(params, dict):
                         for attr in params:
-                            _LOGGER.debug("%s.wsupdate: %s", attr, str(params))
-                            self.__update(attr, params[attr])
+                            await self.update_component(attr, params[attr])
                     # self._webhooks = result["webhooks"]
 
         except Exception as err:
             _LOGGER.error("REQUEST FAILED: %s", err)
             raise err
+        self.metrics.parsed(time.perf_counter() - start)
         return None
 
 
+def object_type(name: str) -> str:
+    """Klipper object type, e.g. heater_generic for "heater_generic chamber"
+
+    Numbered objects map to their base type, extruder1 -> extruder.
+    """
+    prefix = name.split(" ", 1)[0]
+    if prefix not in COMPONENT_TYPES:
+        prefix = prefix.rstrip("0123456789")
+    return prefix
+
+
 class PrinterComponent:
-    """PrinterComponent class for Home Assistant"""
+    """PrinterComponent class for Home Assistant
+
+    Subclasses declare their Moonraker fields as __slots__, the key to slot
+    dispatch table is built once per class.
+    """
+
+    __slots__ = ("_id",)
+    _SLOTS: dict = {}
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        slots = {}
+        for klass in reversed(cls.__mro__):
+            for name in klass.__dict__.get("__slots__", ()):
+                if not name.startswith("_"):
+                    slots[name] = klass.__dict__[name]
+        cls._SLOTS = slots
 
     def __init__(self, uid) -> None:
         self._id = uid
 
-    async def update(self, data):
-        """Update Value from JSON"""
-        _LOGGER.debug("%s.update: %s", self.__class__.__name__, str(data))
+    @classmethod
+    def fields(cls) -> tuple:
+        """Moonraker fields stored by this component"""
+        return tuple(cls._SLOTS)
+
+    async def update(self, data) -> set:
+        """Update Value from JSON, return the attributes whose value changed"""
+        changed = set()
         if data is not None:
+            slots = self._SLOTS
             for attr, value in data.items():
-                if hasattr(self, attr):
-                    setattr(self, attr, value)
-                    _LOGGER.debug(
-                        "%s attr: %s :: %s  :: %s",
-                        self.__class__.__name__,
-                        attr,
-                        str(value),
-                        getattr(self, attr),
-                    )
+                slot = slots.get(attr)
+                if slot is not None and slot.__get__(self) != value:
+                    slot.__set__(self, value)
+                    changed.add(attr)
+            if changed and _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "%s.update: %s", self.__class__.__name__, sorted(changed)
+                )
+        return changed
 
 
 class Heater(PrinterComponent):
     """HeaterBed class for Home Assistant"""
 
+    __slots__ = ("temperature", "target", "power")
+
     def __init__(self, uid) -> None:
         super().__init__(uid)
         self.temperature = None
@@ -148,6 +380,8 @@ class Heater(PrinterComponent):
 class Extruder(Heater):
     """Extruder class for Home Assistant"""
 
+    __slots__ = ("can_extrude", "pressure_advance", "smooth_time")
+
     def __init__(self, uid) -> None:
         super().__init__(uid)
         self.can_extrude = None
@@ -158,6 +392,24 @@ class Extruder(Heater):
 class Toolhead(PrinterComponent):
     """Toolhead class for Home Assistant"""
 
+    __slots__ = (
+        "max_accel",
+        "max_velocity",
+        "max_accel_to_decel",
+        "square_corner_velocity",
+        "homed_axes",
+        "axis_minimum",
+        "axis_maximum",
+        "position",
+        "extruder",
+        "stalls",
+    )
+    FIELD_SOURCES = {
+        "position_x": "position",
+        "position_y": "position",
+        "position_z": "position",
+    }
+
     def __init__(self, uid) -> None:
         super().__init__(uid)
         self.max_accel = None
@@ -196,15 +448,53 @@ class Toolhead(PrinterComponent):
 class Fan(PrinterComponent):
     """HeaterBed class for Home Assistant"""
 
+    __slots__ = ("speed", "rpm")
+
     def __init__(self, uid) -> None:
         super().__init__(uid)
         self.speed = None
         self.rpm = None
 
 
+class TemperatureFan(Fan):
+    """TemperatureFan class for Home Assistant"""
+
+    __slots__ = ("temperature", "target")
+
+    def __init__(self, uid) -> None:
+        super().__init__(uid)
+        self.temperature = None
+        self.target = None
+
+
+class TemperatureSensor(PrinterComponent):
+    """TemperatureSensor class for Home Assistant"""
+
+    __slots__ = ("temperature", "measured_min_temp", "measured_max_temp")
+
+    def __init__(self, uid) -> None:
+        super().__init__(uid)
+        self.temperature = None
+        self.measured_min_temp = None
+        self.measured_max_temp = None
+
+
+class FilamentSensor(PrinterComponent):
+    """FilamentSensor class for Home Assistant"""
+
+    __slots__ = ("filament_detected", "enabled")
+
+    def __init__(self, uid) -> None:
+        super().__init__(uid)
+        self.filament_detected = None
+        self.enabled = None
+
+
 class DisplayStatus(PrinterComponent):
     """DisplayStatus class for Home Assistant"""
 
+    __slots__ = ("progress", "message")
+
     def __init__(self, uid) -> None:
         super().__init__(uid)
         self.progress = None
@@ -214,6 +504,20 @@ class DisplayStatus(PrinterComponent):
 class Klipper(PrinterComponent):
     """Extruder class for Home Assistant"""
 
+    __slots__ = (
+        "klippy_connected",
+        "klippy_state",
+        "components",
+        "failed_components",
+        "registered_directories",
+        "warnings",
+        "websocket_count",
+        "moonraker_version",
+        "missing_klippy_requirements",
+        "api_version",
+        "api_version_string",
+    )
+
     def __init__(self, uid) -> None:
         super().__init__(uid)
         self.klippy_connected = None
@@ -229,14 +533,80 @@ class Klipper(PrinterComponent):
         self.api_version_string = None
 
 
-class MoonrakerStats:
-    """MoonrakerStats class for Home Assistant"""
+class Webhooks(PrinterComponent):
+    """Webhooks class for Home Assistant"""
+
+    __slots__ = ("state", "state_message")
 
     def __init__(self, uid) -> None:
-        self._id = uid
+        super().__init__(uid)
+        self.state = None
+        self.state_message = None
 
-    async def update(self, data):
-        """Update Value from JSON"""
-        if data is not None:
-            for attr, value in data.items():
-                setattr(self, attr, value)
+
+class PrintStats(PrinterComponent):
+    """PrintStats class for Home Assistant"""
+
+    __slots__ = (
+        "filename",
+        "total_duration",
+        "print_duration",
+        "filament_used",
+        "state",
+        "message",
+        "info",
+    )
+
+    def __init__(self, uid) -> None:
+        super().__init__(uid)
+        self.filename = None
+        self.total_duration = None
+        self.print_duration = None
+        self.filament_used = None
+        self.state = None
+        self.message = None
+        self.info = None
+
+
+class MoonrakerStats(PrinterComponent):
+    """MoonrakerStats class for Home Assistant (notify_proc_stat_update)"""
+
+    __slots__ = (
+        "moonraker_stats",
+        "cpu_temp",
+        "network",
+        "system_cpu_usage",
+        "system_memory",
+        "system_uptime",
+        "websocket_connections",
+    )
+
+    def __init__(self, uid) -> None:
+        super().__init__(uid)
+        self.moonraker_stats = None
+        self.cpu_temp = None
+        self.network = None
+        self.system_cpu_usage = None
+        self.system_memory = None
+        self.system_uptime = None
+        self.websocket_connections = None
+
+
+# Klipper object type -> component class, see object_type()
+COMPONENT_TYPES = {
+    "display_status": DisplayStatus,
+    "toolhead": Toolhead,
+    "extruder": Extruder,
+    "heater_bed": Heater,
+    "heater_generic": Heater,
+    "temperature_sensor": TemperatureSensor,
+    "temperature_fan": TemperatureFan,
+    "fan": Fan,
+    "heater_fan": Fan,
+    "controller_fan": Fan,
+    "fan_generic": Fan,
+    "filament_switch_sensor": FilamentSensor,
+    "filament_motion_sensor": FilamentSensor,
+    "webhooks": Webhooks,
+    "print_stats": PrintStats,
+}
@@ -0,0 +1,78 @@
+""" Attribute projection of subscriptions and queries """
+from .const import (
+    SENSORS_LIST,
+    CLIMATES_LIST,
+    NUMBERS_LIST,
+    CLIMATE_EXTRUDERS_MODELS,
+    NUMBER_EXTRUDERS_MODELS,
+)
+from .printer import Heater
+
+# Heater fields the coordinator always reads
+HEATER_FIELDS = ("temperature", "target", "power")
+
+
+def descriptor_fields(descriptor: dict) -> list:
+    """(component, attribute) pairs read by an entity descriptor"""
+    component = descriptor.get("component")
+    if "climate_type" in descriptor:
+        return [
+            (component, descriptor["climate_type"]),
+            (component, descriptor["climate_target"]),
+            (component, descriptor["climate_power"]),
+        ]
+    return [(component, descriptor["attribut"])]
+
+
+def default_fields(extruders: list) -> set:
+    """Fields of every entity the platforms create for these extruders"""
+    fields = set()
+    for descriptor in SENSORS_LIST + CLIMATES_LIST + NUMBERS_LIST:
+        fields.update(descriptor_fields(descriptor))
+    for extruder in extruders:
+        for model in (CLIMATE_EXTRUDERS_MODELS, NUMBER_EXTRUDERS_MODELS):
+            fields.update(descriptor_fields({**model, "component": extruder}))
+    return fields
+
+
+def internal_fields(printer, objects: list) -> set:
+    """Fields the coordinator reads whatever entities are enabled
+
+    print_stats.state drives the polling interval, heater temperature,
+    target and power feed is_heating and the temperature history.
+    """
+    fields = set()
+    for obj in objects:
+        if obj == "print_stats":
+            fields.add((obj, "state"))
+        elif isinstance(printer.component(obj), Heater):
+            fields.update((obj, attr) for attr in HEATER_FIELDS)
+    return fields
+
+
+def build_projection(printer, objects: list, fields) -> dict:
+    """Minimal {object: [fields]} to request for the given entity fields
+
+    The internal fields are always requested, objects nothing reads are
+    left out.
+    """
+    wanted = {}
+    for component, attr in fields:
+        component, attr = printer.field_source(component, attr)
+        wanted.setdefault(component, set()).add(attr)
+    for component, attr in internal_fields(printer, objects):
+        wanted.setdefault(component, set()).add(attr)
+    projection = {obj: sorted(wanted[obj]) for obj in objects if obj in wanted}
+    # webhooks.state drives the Klippy lifecycle
+    webhooks = projection.setdefault("webhooks", ["state"])
+    if "state" not in webhooks:
+        projection["webhooks"] = sorted([*webhooks, "state"])
+    return projection
+
+
+def projection_query(projection: dict) -> str:
+    """printer/objects/query string for a projection"""
+    return "&".join(
+        obj if attrs is None else f"{obj}={','.join(attrs)}"
+        for obj, attrs in projection.items()
+    )
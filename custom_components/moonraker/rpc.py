@@ -0,0 +1,168 @@
+""" Moonraker JSON-RPC websocket session """
+import asyncio
+import logging
+from typing import Awaitable, Callable
+import websockets
+from websockets.exceptions import ConnectionClosed
+
+from .const import INGEST_QUEUE_SIZE, WS_REQUEST_TIMEOUT
+from .codec import StaticRequest, encode_request, loads
+from .trace import FrameTracer
+from .metrics import PrinterMetrics
+from .ingest import IngestQueue
+
+_LOGGER = logging.getLogger(__name__)
+_trace_frame = FrameTracer(_LOGGER)
+
+
+class MoonrakerRpcSession:
+    """Single websocket per printer multiplexing requests and notifications
+
+    Responses are matched to the awaiting caller through their JSON-RPC id,
+    every other frame goes through a bounded ingest queue to the
+    notification callback, so a slow parser never stalls the reader.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        next_id: Callable[[], int],
+        on_notification: Callable[[dict], Awaitable],
+        timeout: float = WS_REQUEST_TIMEOUT,
+        metrics: PrinterMetrics = None,
+        ingest_size: int = INGEST_QUEUE_SIZE,
+    ) -> None:
+        self._url = url
+        self._next_id = next_id
+        self._on_notification = on_notification
+        self._timeout = timeout
+        self._metrics = metrics if metrics is not None else PrinterMetrics()
+        self._websocket = None
+        self._reader = None
+        self._ingest_size = ingest_size
+        self._queue = None
+        self._consumer = None
+        self._pending = {}
+
+    @property
+    def connected(self) -> bool:
+        return self._websocket is not None and self._websocket.open
+
+    async def connect(self) -> None:
+        """Open the websocket and start reading frames"""
+        if self.connected:
+            return
+        self._websocket = await websockets.connect(  # pylint:disable=no-member
+            self._url, ping_interval=None
+        )
+        self._queue = IngestQueue(self._ingest_size, self._metrics)
+        self._consumer = asyncio.create_task(self._consume(self._queue))
+        self._reader = asyncio.create_task(
+            self._read_loop(self._websocket, self._queue)
+        )
+
+    async def call(
+        self, method: str, params: dict = None, timeout: float = None
+    ) -> dict:
+        """Send a request and wait for the matching response
+
+        timeout overrides the session request timeout.
+        """
+        req_id = self._next_id()
+        message = encode_request(method, req_id, params)
+        return await self._request(method, req_id, message, timeout)
+
+    async def call_static(self, request: StaticRequest) -> dict:
+        """Send a pre-encoded request and wait for the matching response"""
+        req_id = self._next_id()
+        return await self._request(request.method, req_id, request.encode(req_id))
+
+    async def _request(
+        self, method: str, req_id: int, message: str, timeout: float = None
+    ) -> dict:
+        if not self.connected:
+            raise ConnectionError(f"Websocket not connected for {method}")
+        future = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = future
+        try:
+            await self._websocket.send(message)
+            self._metrics.sent(len(message))
+            return await asyncio.wait_for(
+                future, self._timeout if timeout is None else timeout
+            )
+        finally:
+            self._pending.pop(req_id, None)
+
+    async def wait_closed(self) -> None:
+        """Wait for the reader to stop, i.e. the connection to drop"""
+        if self._reader is not None:
+            await asyncio.shield(self._reader)
+
+    async def drain(self) -> None:
+        """Wait for the notifications received so far to be handled
+
+        A snapshot applied before older queued deltas would be overwritten
+        by them.
+        """
+        consumer = self._consumer
+        if consumer is None or consumer.done():
+            return
+        join = asyncio.ensure_future(self._queue.join())
+        await asyncio.wait({join, consumer}, return_when=asyncio.FIRST_COMPLETED)
+        join.cancel()
+
+    async def close(self) -> None:
+        """Close the websocket and fail pending requests"""
+        websocket = self._websocket
+        if websocket is not None:
+            await websocket.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        if self._consumer is not None:
+            self._consumer.cancel()
+            await asyncio.gather(self._consumer, return_exceptions=True)
+            self._consumer = None
+
+    async def _consume(self, queue: IngestQueue) -> None:
+        while True:
+            data = await queue.get()
+            if data is None:
+                return
+            try:
+                await self._on_notification(data)
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.exception("Websocket notification failed: %s", err)
+
+    async def _read_loop(self, websocket, queue: IngestQueue) -> None:
+        try:
+            async for raw in websocket:
+                try:
+                    self._read_frame(raw, queue)
+                except Exception as err:  # pylint: disable=broad-except
+                    # One bad frame must not end the connection
+                    _LOGGER.exception("Ignoring websocket frame: %s", err)
+        except ConnectionClosed as err:
+            _LOGGER.error("REQUEST websockets : %s", err)
+        finally:
+            # Frames already queued are still handled
+            queue.close()
+            if self._websocket is websocket:
+                self._websocket = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Websocket closed"))
+            await websocket.close()
+
+    def _read_frame(self, raw, queue: IngestQueue) -> None:
+        self._metrics.frame_received(len(raw))
+        _trace_frame("websockets frame", raw)
+        data = loads(raw)
+        if not isinstance(data, dict):
+            raise ValueError(f"not a JSON-RPC object: {raw[:80]!r}")
+        future = self._pending.get(data.get("id"))
+        if future is not None:
+            if not future.done():
+                future.set_result(data)
+            return
+        queue.put(data)
@@ -0,0 +1,63 @@
+""" Adaptive HTTP polling interval """
+import time
+
+from .const import (
+    POLLING,
+    POLLING_ACTIVE,
+    POLLING_BOOST,
+    POLLING_BOOST_DURATION,
+    POLLING_BACKOFF_MAX,
+)
+
+ACTIVE_STATES = ("printing",)
+
+
+class PollingScheduler:
+    """Pick the next polling interval from the printer state
+
+    Fast while printing or heating, slow when idle or Klippy is not ready,
+    exponential backoff while the host is unreachable and a short boost
+    after a command so its effect shows up quickly.
+    """
+
+    def __init__(
+        self,
+        idle: float = POLLING,
+        active: float = POLLING_ACTIVE,
+        boost: float = POLLING_BOOST,
+        boost_duration: float = POLLING_BOOST_DURATION,
+        backoff_max: float = POLLING_BACKOFF_MAX,
+    ) -> None:
+        self._idle = idle
+        self._active = active
+        self._boost = boost
+        self._boost_duration = boost_duration
+        self._backoff_max = backoff_max
+        self._boost_until = 0.0
+        self._failures = 0
+
+    @property
+    def failures(self) -> int:
+        return self._failures
+
+    def boost(self) -> None:
+        """Poll fast for boost_duration seconds"""
+        self._boost_until = time.monotonic() + self._boost_duration
+
+    def success(self) -> None:
+        self._failures = 0
+
+    def failure(self) -> None:
+        self._failures += 1
+
+    def interval(self, printer) -> float:
+        """Seconds until the next poll"""
+        if self._failures > 0:
+            return min(self._backoff_max, self._idle * 2 ** (self._failures - 1))
+        if time.monotonic() < self._boost_until:
+            return self._boost
+        if printer.klippy.klippy_state != "ready":
+            return self._idle
+        if printer.print_stats.state in ACTIVE_STATES or printer.is_heating:
+            return self._active
+        return self._idle
@@ -5,8 +5,7 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.components.sensor import (
     # SensorDeviceClass,
     SensorEntity,
@@ -14,7 +13,15 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.util import slugify as util_slugify
 from .common_raker import MoonrakerUpdateCoordinator
-from .const import DOMAIN, SENSORS_LIST
+from .entity import MoonrakerEntity
+from .const import (
+    DOMAIN,
+    SENSORS_LIST,
+    DIAGNOSTIC_SENSORS_LIST,
+    HISTORY_SENSORS_LIST,
+    CLIMATES_LIST,
+    CONF_PRINTER_EXTRUDERS,
+)
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -30,6 +37,13 @@ async def async_setup_entry(
     entities: list[SensorEntity] = []
     for param in SENSORS_LIST:
         entities.append(MoonrakerSensorBase(coordinator, param))
+    for param in DIAGNOSTIC_SENSORS_LIST:
+        entities.append(MoonrakerDiagnosticSensor(coordinator, param))
+    heaters = [climate["component"] for climate in CLIMATES_LIST]
+    heaters += config_entry.data.get(CONF_PRINTER_EXTRUDERS).split(";")
+    for heater in heaters:
+        for param in HISTORY_SENSORS_LIST:
+            entities.append(MoonrakerHistorySensor(coordinator, param, heater))
 
     # EXTRA_SENSORS = config_entry.data.get(CONF_PRINTER_HEATER_FAN).split(";")
     # for param in EXTRA_SENSORS:
@@ -38,7 +52,7 @@ async def async_setup_entry(
     async_add_entities(entities)
 
 
-class MoonrakerSensorBase(CoordinatorEntity, SensorEntity):
+class MoonrakerSensorBase(MoonrakerEntity, SensorEntity):
     """Moonraker Sensor Base entity for Home Assistant"""
 
     should_poll = False
@@ -47,7 +61,11 @@ class MoonrakerSensorBase(CoordinatorEntity, SensorEntity):
         self, coordinator: MoonrakerUpdateCoordinator, properties: dict
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        super().__init__(
+            coordinator,
+            [(properties.get("component"), properties["attribut"])],
+            properties.get("deadband"),
+        )
         self._attribut = properties["attribut"]
         if "component" in properties:
             self._component = properties["component"]
@@ -73,6 +91,80 @@ class MoonrakerSensorBase(CoordinatorEntity, SensorEntity):
                 getattr(self.coordinator.printer, self._component), self._attribut
             )
 
+    def _deadband_values(self) -> tuple:
+        return (self.native_value,)
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return self.coordinator.moonraker.printer.device_info
+
+
+class MoonrakerDiagnosticSensor(SensorEntity):
+    """Performance metric of the integration for one printer"""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_should_poll = True
+
+    def __init__(
+        self, coordinator: MoonrakerUpdateCoordinator, properties: dict
+    ) -> None:
+        """Initialize the sensor."""
+        self.coordinator = coordinator
+        self._attribut = properties["attribut"]
+        self._name = properties["name"]
+        self._code = util_slugify(self._name)
+        self._device_name = coordinator.moonraker.printer_id
+        self._attr_unique_id = f"{self._device_name}_{self._code}"
+        self._attr_icon = properties["attr_icon"]
+        self._attr_native_unit_of_measurement = properties["unit_of_measurement"]
+
+    @property
+    def name(self) -> str:
+        """Return the name of the sensor."""
+        return f"{self._name} {self._device_name}"
+
+    @property
+    def native_value(self) -> StateType:
+        return self.coordinator.metrics.summary[self._attribut]
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return self.coordinator.moonraker.printer.device_info
+
+
+class MoonrakerHistorySensor(SensorEntity):
+    """Statistic of a heater temperature history, polled"""
+
+    _attr_should_poll = True
+
+    def __init__(
+        self, coordinator: MoonrakerUpdateCoordinator, properties: dict, heater: str
+    ) -> None:
+        """Initialize the sensor."""
+        self.coordinator = coordinator
+        self._heater = heater
+        self._attribut = properties["attribut"]
+        self._name = f"{heater} {properties['name']}"
+        self._code = util_slugify(self._name)
+        self._device_name = coordinator.moonraker.printer_id
+        self._attr_unique_id = f"{self._device_name}_{self._code}"
+        self._attr_icon = properties["attr_icon"]
+        self._attr_native_unit_of_measurement = properties["unit_of_measurement"]
+
+    @property
+    def name(self) -> str:
+        """Return the name of the sensor."""
+        return f"{self._name} {self._device_name}"
+
+    @property
+    def native_value(self) -> StateType:
+        history = self.coordinator.printer.history(self._heater)
+        if history is None:
+            return None
+        # Cached by the history until the next sample, shared by the sensors
+        return history.stats().get(self._attribut)
+
     @property
     def device_info(self) -> DeviceInfo:
         return self.coordinator.moonraker.printer.device_info
@@ -0,0 +1,56 @@
+""" Moonraker printer state cache """
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STORE_SAVE_DELAY, STORE_VERSION
+from .printer import Printer
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PrinterStateStore:
+    """Last known printer state, kept in HA storage across restarts"""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, printer: Printer) -> None:
+        self._store = Store(hass, STORE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._printer = printer
+        self._scheduled = False
+
+    async def async_restore(self) -> bool:
+        """Load the cached state into the printer, True if there was one"""
+        try:
+            data = await self._store.async_load()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Ignoring unreadable state cache: %s", err)
+            return False
+        if not data or not data.get("components"):
+            return False
+        await self._printer.restore(data["components"])
+        return True
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Write the state within STORE_SAVE_DELAY seconds
+
+        At most one write per delay however often it is called, the
+        snapshot is taken when the write happens.
+        """
+        if not self._scheduled:
+            self._scheduled = True
+            self._store.async_delay_save(self._data_to_save, STORE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        self._scheduled = False
+        return {"components": self._printer.snapshot()}
+
+    async def async_flush(self) -> None:
+        """Write a pending save now, before the entry unloads"""
+        if self._scheduled:
+            await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Delete the cache of a removed entry"""
+        await self._store.async_remove()
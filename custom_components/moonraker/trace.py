@@ -0,0 +1,22 @@
+""" Sampled debug traces for the websocket hot path """
+import logging
+
+from .const import LOG_FRAME_SAMPLE
+
+
+class FrameTracer:
+    """Log one frame in `every` at DEBUG level, nothing is formatted otherwise"""
+
+    def __init__(self, logger: logging.Logger, every: int = LOG_FRAME_SAMPLE) -> None:
+        self._logger = logger
+        self._every = max(1, every)
+        self._count = 0
+
+    def __call__(self, message: str, frame) -> None:
+        if not self._logger.isEnabledFor(logging.DEBUG):
+            return
+        self._count += 1
+        if self._count % self._every == 0:
+            self._logger.debug(
+                "%s (frame %d, 1 in %d) : %s", message, self._count, self._every, frame
+            )
@@ -0,0 +1,77 @@
+""" Moonraker HTTP transport """
+import logging
+import aiohttp
+
+from .codec import loads
+from .metrics import PrinterMetrics
+from .const import HTTP_CONNECTION_LIMIT, HTTP_KEEPALIVE_TIMEOUT, HTTP_TIMEOUT
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class MoonrakerHttpTransport:
+    """Keep-alive aiohttp session shared by every HTTP request to one printer"""
+
+    def __init__(
+        self,
+        limit: int = HTTP_CONNECTION_LIMIT,
+        keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT,
+        timeout: float = HTTP_TIMEOUT,
+        metrics: PrinterMetrics = None,
+    ) -> None:
+        self._limit = limit
+        self._keepalive_timeout = keepalive_timeout
+        self._timeout = timeout
+        self._metrics = metrics if metrics is not None else PrinterMetrics()
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Session bound to the running loop, created on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit,
+                keepalive_timeout=self._keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self._timeout),
+            )
+        return self._session
+
+    async def get(self, url, headers=None) -> dict:
+        """GET url and return the decoded JSON body"""
+        self._metrics.sent(len(str(url)))
+        async with self.session.get(str(url), headers=headers) as res:
+            if res.status != 200:
+                raise ConnectionError(
+                    "REQUEST FAILED for {url} with status code {code}".format(
+                        url=str(url), code=res.status
+                    )
+                )
+            body = await res.read()
+            self._metrics.frame_received(len(body))
+            return loads(body)
+
+    async def post(self, url, data=None, headers=None, timeout: float = None) -> int:
+        """POST form data to url and return the status code
+
+        timeout overrides the session total timeout.
+        """
+        size = len(str(url)) + sum(len(str(value)) for value in (data or {}).values())
+        self._metrics.sent(size)
+        kwargs = {}
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+        async with self.session.post(
+            str(url), data=data, headers=headers, **kwargs
+        ) as res:
+            self._metrics.frame_received(len(await res.read()))
+            return res.status
+
+    async def close(self) -> None:
+        """Close the session and its pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
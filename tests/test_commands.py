@@ -0,0 +1,90 @@
+"""Tests for the outbound G-code queue"""
+import asyncio
+
+import pytest
+
+from custom_components.moonraker.commands import CommandQueue, is_blocking
+
+
+def run_batches(*commands) -> tuple:
+    """Send (gcode, key) commands at once, return the scripts and results"""
+    scripts = []
+
+    async def send(script: str) -> bool:
+        scripts.append(script)
+        return True
+
+    async def main():
+        queue = CommandQueue(send, delay=0)
+        return await asyncio.gather(*(queue.send(*command) for command in commands))
+
+    return scripts, asyncio.run(main())
+
+
+def test_same_key_collapses_to_the_latest():
+    scripts, results = run_batches(("M104 S200", "tool"), ("M104 S210", "tool"))
+    assert scripts == ["M104 S210"]
+    assert results == [True, True]
+
+
+def test_unkeyed_command_is_a_barrier():
+    scripts, _ = run_batches(
+        ("M104 S200", "tool"), ("M117 Hello", None), ("M104 S210", "tool")
+    )
+    assert scripts == ["M104 S200\nM117 Hello\nM104 S210"]
+
+
+def test_different_keys_share_a_batch():
+    scripts, _ = run_batches(("M104 S200", "tool"), ("M140 S60", "bed"))
+    assert scripts == ["M104 S200\nM140 S60"]
+
+
+def test_blocking_commands_are_sent_alone():
+    scripts, _ = run_batches(
+        ("M104 S200", "tool"),
+        ("G28", None),
+        ("M140 S60", "bed"),
+        ("M190 S60", None),
+        ("M106 S255", "fan"),
+    )
+    assert scripts == ["M104 S200", "G28", "M140 S60", "M190 S60", "M106 S255"]
+
+
+def test_is_blocking():
+    assert is_blocking("g28 X")
+    assert is_blocking("M104 S200\nM109 S200")
+    assert is_blocking("TEMPERATURE_WAIT SENSOR=extruder MINIMUM=200")
+    assert not is_blocking("M104 S200")
+    assert not is_blocking("")
+
+
+def test_send_error_fails_the_whole_batch():
+    async def send(script: str) -> bool:
+        raise ConnectionError("down")
+
+    async def main():
+        queue = CommandQueue(send, delay=0)
+        return await asyncio.gather(
+            queue.send("M104 S200", "tool"),
+            queue.send("M140 S60", "bed"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_close_fails_waiting_callers():
+    async def send(script: str) -> bool:
+        await asyncio.sleep(10)
+        return True
+
+    async def main():
+        queue = CommandQueue(send, delay=0)
+        sending = asyncio.ensure_future(queue.send("M104 S200"))
+        await asyncio.sleep(0.01)
+        await queue.close()
+        await sending
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(main())
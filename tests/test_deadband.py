@@ -0,0 +1,61 @@
+"""Tests for the state write deadband"""
+import math
+
+from custom_components.moonraker.deadband import Deadband
+
+
+def written(deadband: Deadband, values: tuple, now: float = 0.0) -> Deadband:
+    deadband.written(values, now)
+    return deadband
+
+
+def test_first_values_are_written():
+    assert Deadband(abs_tol=1).check((20.0,), now=0) == 0
+
+
+def test_equal_values_are_never_due():
+    deadband = written(Deadband(abs_tol=1), (20.0,))
+    assert deadband.check((20.0,), now=1) == math.inf
+
+
+def test_abs_tolerance_holds_small_changes_until_heartbeat():
+    deadband = written(Deadband(abs_tol=0.5, heartbeat=60), (20.0,))
+    assert deadband.check((20.3,), now=10) == 50
+    assert deadband.check((20.6,), now=10) == 0
+
+
+def test_rel_tolerance_scales_with_the_value():
+    deadband = written(Deadband(rel_tol=0.01, heartbeat=60), (200.0,))
+    assert deadband.check((201.5,), now=1) == 59
+    assert deadband.check((202.5,), now=1) == 0
+
+
+def test_heartbeat_writes_held_back_values():
+    deadband = written(Deadband(abs_tol=1, heartbeat=60), (20.0,))
+    assert deadband.check((20.1,), now=60) == 0
+
+
+def test_min_interval_delays_significant_changes():
+    deadband = written(Deadband(abs_tol=1, min_interval=5), (20.0,))
+    assert deadband.check((25.0,), now=2) == 3
+    assert deadband.check((25.0,), now=6) == 0
+
+
+def test_transitions_are_always_written():
+    deadband = written(Deadband(abs_tol=10, min_interval=5), (0.5, "idle"))
+    # Heater turning off
+    assert deadband.check((0, "idle"), now=1) == 0
+    # Non numeric change
+    assert deadband.check((0.5, "printing"), now=1) == 0
+    # Value appearing
+    assert written(Deadband(abs_tol=10), (None,)).check((20.0,), now=1) == 0
+
+
+def test_from_descriptor():
+    assert Deadband.from_descriptor(None) is None
+    deadband = Deadband.from_descriptor({"abs": 0.5, "min_interval": 2})
+    assert (deadband.abs_tol, deadband.rel_tol, deadband.min_interval) == (
+        0.5,
+        0,
+        2,
+    )
@@ -0,0 +1,37 @@
+"""Tests for the fleet manager"""
+from custom_components.moonraker.fleet import MoonrakerFleet
+
+
+def test_phases_are_spread_over_the_interval():
+    fleet = MoonrakerFleet()
+    for member in ("a", "b", "c", "d"):
+        fleet.register(member)
+    assert [fleet.phase(member, 20) for member in ("a", "b", "c", "d")] == [
+        0,
+        5,
+        10,
+        15,
+    ]
+    fleet.unregister("b")
+    assert fleet.members == ["a", "c", "d"]
+    assert fleet.phase("b", 20) == 0
+
+
+def test_align_stays_within_half_and_one_and_a_half_interval():
+    fleet = MoonrakerFleet()
+    fleet.register("a")
+    fleet.register("b")
+    for interval in (1, 5, 30):
+        assert interval / 2 <= fleet.align("b", interval) <= interval * 1.5
+
+
+def test_timeout_shrinks_with_failures():
+    fleet = MoonrakerFleet(timeout=10, timeout_min=2)
+    assert fleet.timeout("a") == 10
+    fleet.record("a", False)
+    assert fleet.timeout("a") == 5
+    for _ in range(5):
+        fleet.record("a", False)
+    assert fleet.timeout("a") == 2
+    fleet.record("a", True)
+    assert fleet.timeout("a") == 10
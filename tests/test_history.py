@@ -0,0 +1,54 @@
+"""Tests for the heater temperature history"""
+from custom_components.moonraker.history import TemperatureHistory
+
+
+def ramp(count: int, size: int = 1200) -> TemperatureHistory:
+    """History heating one degree per second, the last sample at t=1000"""
+    history = TemperatureHistory(size)
+    for second in range(count):
+        history.append(20.0 + second, 200.0, 0.5, 1000.0 - count + 1 + second)
+    return history
+
+
+def test_samples_closer_than_the_interval_are_skipped():
+    history = TemperatureHistory(10)
+    assert history.append(20.0, now=100.0)
+    assert not history.append(21.0, now=100.5)
+    assert not history.append(None, now=102.0)
+    assert len(history) == 1
+
+
+def test_ring_keeps_the_latest_samples():
+    history = ramp(15, size=10)
+    assert len(history) == 10
+    stats = history.stats(window=100, now=1000.0)
+    assert (stats["temperature_min"], stats["temperature_max"]) == (25.0, 34.0)
+
+
+def test_stats_over_the_window():
+    stats = ramp(600).stats(window=10, now=1000.0)
+    assert stats["temperature_min"] == 609.0
+    assert stats["temperature_max"] == 619.0
+    assert stats["temperature_mean"] == 614.0
+    assert stats["heating_rate"] == 60.0
+
+
+def test_stats_are_cached_until_the_next_sample():
+    history = ramp(5)
+    stats = history.stats()
+    assert history.stats() is stats
+    history.append(30.0, now=2000.0)
+    assert history.stats() is not stats
+
+
+def test_empty_window_has_no_stats():
+    assert ramp(5).stats(window=10, now=5000.0) == {}
+
+
+def test_backfill_replaces_the_samples():
+    history = ramp(5)
+    history.backfill(
+        {"temperatures": [20.0, 21.0, 22.0], "targets": [60.0] * 3}, now=500.0
+    )
+    assert len(history) == 3
+    assert history.downsample(60, now=500.0) == [[480.0, 20.0, 21.0, 22.0, 60.0]]
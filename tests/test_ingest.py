@@ -0,0 +1,112 @@
+"""Tests for the websocket ingest queue"""
+import asyncio
+
+from custom_components.moonraker.ingest import IngestQueue
+from custom_components.moonraker.metrics import PrinterMetrics
+
+
+def status(fields: dict, eventtime: float = 1.0) -> dict:
+    return {"method": "notify_status_update", "params": [fields, eventtime]}
+
+
+def proc_stat(cpu: float) -> dict:
+    return {"method": "notify_proc_stat_update", "params": [{"cpu_temp": cpu}]}
+
+
+def drain(queue: IngestQueue) -> list:
+    async def main():
+        queue.close()
+        frames = []
+        data = await queue.get()
+        while data is not None:
+            frames.append(data)
+            data = await queue.get()
+        return frames
+
+    return asyncio.run(main())
+
+
+def test_frames_are_queued_in_order_below_the_bound():
+    queue = IngestQueue(maxsize=4)
+    frames = [status({"extruder": {"temperature": value}}) for value in (1, 2, 3)]
+    for frame in frames:
+        queue.put(frame)
+    assert queue.depth == 3
+    assert drain(queue) == frames
+
+
+def test_full_queue_merges_status_deltas():
+    metrics = PrinterMetrics()
+    queue = IngestQueue(maxsize=1, metrics=metrics)
+    queue.put(status({"extruder": {"temperature": 1, "power": 0.5}}, 1.0))
+    queue.put(status({"extruder": {"temperature": 2}, "fan": {"speed": 1}}, 2.0))
+    assert queue.depth == 1
+    assert metrics.ingest_merged == 1
+    assert drain(queue) == [
+        status(
+            {"extruder": {"temperature": 2, "power": 0.5}, "fan": {"speed": 1}}, 2.0
+        )
+    ]
+
+
+def test_full_queue_replaces_proc_stat():
+    queue = IngestQueue(maxsize=1)
+    queue.put(proc_stat(40))
+    queue.put(proc_stat(41))
+    assert drain(queue) == [proc_stat(41)]
+
+
+def test_full_queue_drops_other_notifications():
+    metrics = PrinterMetrics()
+    queue = IngestQueue(maxsize=1, metrics=metrics)
+    queue.put(status({"extruder": {"temperature": 1}}))
+    queue.put({"method": "notify_gcode_response", "params": ["ok"]})
+    assert metrics.ingest_dropped == 1
+    assert queue.depth == 1
+
+
+def test_lifecycle_events_are_barriers():
+    queue = IngestQueue(maxsize=1)
+    before = status({"extruder": {"temperature": 1}})
+    ready = {"method": "notify_klippy_ready"}
+    after = status({"extruder": {"temperature": 2}})
+    queue.put(before)
+    queue.put(ready)
+    queue.put(after)
+    # Past the bound rather than merged across the event or lost
+    assert drain(queue) == [before, ready, after]
+
+
+def test_frame_being_handled_is_not_merged_into():
+    async def main():
+        queue = IngestQueue(maxsize=1)
+        queue.put(status({"extruder": {"temperature": 1}}))
+        handled = await queue.get()
+        queue.put(status({"extruder": {"temperature": 2}}))
+        queue.put(status({"extruder": {"temperature": 3}}))
+        queue.close()
+        return handled, await queue.get(), await queue.get()
+
+    handled, merged, end = asyncio.run(main())
+    assert handled["params"][0] == {"extruder": {"temperature": 1}}
+    assert merged["params"][0] == {"extruder": {"temperature": 3}}
+    assert end is None
+
+
+def test_join_waits_for_handled_frames():
+    async def main():
+        queue = IngestQueue()
+        queue.put(status({"extruder": {"temperature": 1}}))
+
+        async def consume():
+            while await queue.get() is not None:
+                await asyncio.sleep(0)
+
+        consumer = asyncio.ensure_future(consume())
+        await asyncio.wait_for(queue.join(), 1)
+        depth = queue.depth
+        queue.close()
+        await consumer
+        return depth
+
+    assert asyncio.run(main()) == 0
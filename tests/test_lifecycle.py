@@ -0,0 +1,31 @@
+"""Tests for the Klippy lifecycle"""
+from custom_components.moonraker.lifecycle import (
+    DISCONNECTED,
+    READY,
+    SHUTDOWN,
+    KlippyLifecycle,
+)
+
+
+def test_transitions_are_counted_once():
+    lifecycle = KlippyLifecycle("test")
+    assert lifecycle.transition(READY)
+    assert not lifecycle.transition(READY)
+    assert lifecycle.ready
+    assert lifecycle.transitions == 1
+
+
+def test_previous_state_is_kept():
+    lifecycle = KlippyLifecycle("test")
+    lifecycle.transition(READY)
+    lifecycle.transition(SHUTDOWN)
+    assert (lifecycle.previous, lifecycle.state) == (READY, SHUTDOWN)
+    assert not lifecycle.ready
+
+
+def test_reset_forgets_the_state():
+    lifecycle = KlippyLifecycle("test")
+    lifecycle.transition(DISCONNECTED)
+    lifecycle.reset()
+    assert lifecycle.state is None
+    assert lifecycle.transition(DISCONNECTED)
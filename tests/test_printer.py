@@ -0,0 +1,97 @@
+"""Tests for Printer change tracking and optimistic values"""
+import asyncio
+
+from custom_components.moonraker.printer import Printer
+
+
+def test_update_records_changed_fields():
+    printer = Printer("test")
+    asyncio.run(
+        printer.update_component("extruder", {"temperature": 20.5, "target": 0})
+    )
+    assert printer.pop_changes() == {
+        ("extruder", "temperature"),
+        ("extruder", "target"),
+    }
+    assert printer.pop_changes() == set()
+
+
+def test_unchanged_values_are_not_recorded():
+    printer = Printer("test")
+    asyncio.run(printer.update_component("heater_bed", {"temperature": 60.0}))
+    printer.pop_changes()
+    asyncio.run(
+        printer.update_component("heater_bed", {"temperature": 60.0, "power": 0.3})
+    )
+    assert printer.pop_changes() == {("heater_bed", "power")}
+
+
+def test_unknown_objects_are_ignored():
+    printer = Printer("test")
+    asyncio.run(printer.update_component("gcode_macro START", {"value": 1}))
+    assert printer.pop_changes() == set()
+    assert printer.component("gcode_macro START") is None
+
+
+def test_field_source_of_printer_state():
+    printer = Printer("test")
+    assert printer.field_source(None, "state") == ("print_stats", "state")
+    assert printer.field_source("extruder", "target") == ("extruder", "target")
+
+
+def make_heating_printer() -> Printer:
+    printer = Printer("test")
+    asyncio.run(printer.update_component("extruder", {"target": 0}))
+    printer.pop_changes()
+    return printer
+
+
+def test_optimistic_value_is_shown_right_away():
+    printer = make_heating_printer()
+    printer.set_optimistic("extruder", "target", 200)
+    assert printer.extruder.target == 200
+    assert printer.is_pending("extruder", "target")
+    assert printer.pop_changes() == {("extruder", "target")}
+
+
+def test_matching_report_confirms_optimistic_value():
+    printer = make_heating_printer()
+    printer.set_optimistic("extruder", "target", 200)
+    asyncio.run(printer.update_component("extruder", {"target": 200}))
+    assert not printer.is_pending("extruder", "target")
+    assert printer.extruder.target == 200
+
+
+def test_stale_report_keeps_optimistic_value():
+    printer = make_heating_printer()
+    printer.set_optimistic("extruder", "target", 200)
+    printer.pop_changes()
+    asyncio.run(printer.update_component("extruder", {"target": 0}))
+    assert printer.is_pending("extruder", "target")
+    assert printer.extruder.target == 200
+    assert printer.pop_changes() == set()
+
+
+def test_rollback_restores_last_reported_value():
+    printer = make_heating_printer()
+    printer.set_optimistic("extruder", "target", 200)
+    asyncio.run(printer.update_component("extruder", {"target": 180}))
+    printer.pop_changes()
+    printer.rollback_optimistic("extruder", "target")
+    assert printer.extruder.target == 180
+    assert not printer.is_pending("extruder", "target")
+    assert printer.pop_changes() == {("extruder", "target")}
+
+
+def test_expired_optimistic_value_rolls_back():
+    printer = make_heating_printer()
+    printer.set_optimistic("extruder", "target", 200, timeout=0)
+    printer.expire_optimistic()
+    assert printer.extruder.target == 0
+    assert not printer.is_pending("extruder", "target")
+
+
+def test_snapshot_keeps_reported_value():
+    printer = make_heating_printer()
+    printer.set_optimistic("extruder", "target", 200)
+    assert printer.snapshot()["extruder"]["target"] == 0
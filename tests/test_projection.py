@@ -0,0 +1,62 @@
+"""Tests for the query and subscription projection"""
+from custom_components.moonraker.printer import Printer
+from custom_components.moonraker.projection import (
+    build_projection,
+    default_fields,
+    projection_query,
+)
+
+OBJECTS = ["extruder", "heater_bed", "print_stats", "toolhead", "gcode_move"]
+
+
+def test_narrowed_listeners_keep_internal_fields():
+    projection = build_projection(
+        Printer("test"), OBJECTS, {("extruder", "temperature")}
+    )
+    assert projection == {
+        "extruder": ["power", "target", "temperature"],
+        "heater_bed": ["power", "target", "temperature"],
+        "print_stats": ["state"],
+        "webhooks": ["state"],
+    }
+
+
+def test_no_listeners_request_internal_fields_only():
+    projection = build_projection(Printer("test"), OBJECTS, set())
+    assert "toolhead" not in projection
+    assert "gcode_move" not in projection
+    assert projection["print_stats"] == ["state"]
+    assert projection["webhooks"] == ["state"]
+
+
+def test_listener_fields_are_added():
+    projection = build_projection(
+        Printer("test"),
+        OBJECTS,
+        {("toolhead", "position"), ("extruder", "pressure_advance")},
+    )
+    assert projection["toolhead"] == ["position"]
+    assert projection["extruder"] == [
+        "power",
+        "pressure_advance",
+        "target",
+        "temperature",
+    ]
+
+
+def test_derived_fields_read_their_source():
+    projection = build_projection(Printer("test"), ["print_stats"], {(None, "state")})
+    assert projection["print_stats"] == ["state"]
+
+
+def test_default_fields_cover_configured_extruders():
+    fields = default_fields(["extruder1"])
+    assert ("extruder1", "target") in fields
+    assert ("extruder1", "temperature") in fields
+
+
+def test_projection_query():
+    assert (
+        projection_query({"print_stats": ["state"], "webhooks": ["state"]})
+        == "print_stats=state&webhooks=state"
+    )
@@ -0,0 +1,51 @@
+"""Tests for the adaptive polling scheduler"""
+import asyncio
+
+from custom_components.moonraker.printer import Printer
+from custom_components.moonraker.scheduler import PollingScheduler
+
+
+def make_printer(klippy_state="ready", **status) -> Printer:
+    printer = Printer("test")
+    printer.klippy.klippy_state = klippy_state
+    for component, values in status.items():
+        asyncio.run(printer.update_component(component, values))
+    return printer
+
+
+def make_scheduler() -> PollingScheduler:
+    return PollingScheduler(idle=30, active=5, boost=1, backoff_max=600)
+
+
+def test_idle_and_active_intervals():
+    scheduler = make_scheduler()
+    assert scheduler.interval(make_printer(print_stats={"state": "standby"})) == 30
+    assert scheduler.interval(make_printer(print_stats={"state": "printing"})) == 5
+
+
+def test_heating_polls_fast():
+    printer = make_printer(print_stats={"state": "standby"}, extruder={"target": 200})
+    assert make_scheduler().interval(printer) == 5
+
+
+def test_klippy_not_ready_polls_slow():
+    printer = make_printer("startup", print_stats={"state": "printing"})
+    assert make_scheduler().interval(printer) == 30
+
+
+def test_boost_after_command():
+    scheduler = make_scheduler()
+    scheduler.boost()
+    assert scheduler.interval(make_printer()) == 1
+
+
+def test_backoff_is_exponential_and_capped():
+    scheduler = make_scheduler()
+    printer = make_printer()
+    intervals = []
+    for _ in range(6):
+        scheduler.failure()
+        intervals.append(scheduler.interval(printer))
+    assert intervals == [30, 60, 120, 240, 480, 600]
+    scheduler.success()
+    assert scheduler.interval(printer) == 30